@@ -1,6 +1,7 @@
 """
 Сервис поиска аналогов недвижимости
 """
+import asyncio
 import logging
 from typing import List, Optional
 from core.models import Lot, Offer
@@ -90,7 +91,8 @@ class AnalogSearchService:
             from parser.google_sheets import find_analogs_in_sheets, find_lot_by_uuid
             
             # Ищем аналоги в листах cian_sale_all и cian_rent_all
-            analogs = find_analogs_in_sheets(lot_uuid, radius_km)
+            # (запрос к Google Sheets синхронный — выполняем в потоке, чтобы не блокировать event loop)
+            analogs = await asyncio.to_thread(find_analogs_in_sheets, lot_uuid, radius_km)
             
             if analogs:
                 logger.info(f"Found {len(analogs)} analogs in Google Sheets for lot {lot_uuid}")
@@ -99,7 +101,7 @@ class AnalogSearchService:
             # Fallback: если в Google Sheets ничего не найдено, ищем по адресу лота
             logger.info(f"No analogs found in Google Sheets for {lot_uuid}, trying fallback search")
             
-            lot = find_lot_by_uuid(lot_uuid)
+            lot = await asyncio.to_thread(find_lot_by_uuid, lot_uuid)
             if lot and lot.address:
                 logger.info(f"Found lot with address: {lot.address}, searching online")
                 return await AnalogSearchService.find_analogs_for_address(lot.address, radius_km)
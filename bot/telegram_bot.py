@@ -12,6 +12,9 @@ from core.config import CONFIG
 
 logger = logging.getLogger(__name__)
 
+# Long polling: Telegram держит getUpdates открытым до появления апдейта (по умолчанию в aiogram 10 с)
+POLLING_TIMEOUT = 30
+
 class RealEstateBot:
     def __init__(self, token: str):
         try:
@@ -354,7 +357,11 @@ class RealEstateBot:
         logger.info("Starting Telegram bot polling...")
         
         try:
-            await self.dp.start_polling(self.bot)
+            await self.dp.start_polling(
+                self.bot,
+                polling_timeout=POLLING_TIMEOUT,
+                allowed_updates=self.dp.resolve_used_update_types()
+            )
         except Exception as e:
             logger.error(f"Bot polling error: {e}")
             raise
@@ -0,0 +1,64 @@
+import sqlite3
+import json
+import logging
+import os
+import time
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Сроки жизни записей: найденные координаты живут месяц,
+# "адрес не найден" — сутки, чтобы не долбить геокодер одними и теми же промахами
+POSITIVE_TTL = 30 * 86400
+NEGATIVE_TTL = 86400
+
+class GeocodeCache:
+    def __init__(self, db_path: str = "data/geocode_cache.db"):
+        self.db_path = db_path
+        # Создаем директорию если не существует
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._init_db()
+
+    def _init_db(self):
+        """Инициализация базы данных"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS geocode_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """
+        Ищет запись в кэше
+        Returns: (is_hit, value) — value может быть None для закэшированного промаха
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM geocode_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+        if not row or row[1] < time.time():
+            return False, None
+
+        return True, json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float = POSITIVE_TTL):
+        """Сохраняет значение (любое JSON-сериализуемое, в том числе None)"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO geocode_cache (key, value, expires_at)
+                VALUES (?, ?, ?)
+            """, (key, json.dumps(value, ensure_ascii=False), time.time() + ttl))
+
+    def purge_expired(self) -> int:
+        """Удаляет просроченные записи, возвращает их количество"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute("DELETE FROM geocode_cache WHERE expires_at < ?", (time.time(),))
+            return cursor.rowcount
+
+# Глобальный экземпляр
+geocode_cache = GeocodeCache()
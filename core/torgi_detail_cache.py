@@ -0,0 +1,56 @@
+import sqlite3
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Карточка активного лота может меняться (статус, даты), поэтому храним сутки
+DETAIL_TTL = 86400
+
+class TorgiDetailCache:
+    def __init__(self, db_path: str = "data/torgi_detail_cache.db"):
+        self.db_path = db_path
+        # Создаем директорию если не существует
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._init_db()
+
+    def _init_db(self):
+        """Инициализация базы данных"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS lot_details (
+                    lot_id TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+
+    def get(self, lot_id: Any, ttl: float = DETAIL_TTL) -> Optional[Dict[str, Any]]:
+        """Возвращает карточку лота, если она загружена не раньше ttl секунд назад"""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT body FROM lot_details WHERE lot_id = ? AND fetched_at >= ?",
+                (str(lot_id), time.time() - ttl)
+            ).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def set(self, lot_id: Any, detail: Dict[str, Any]):
+        """Сохраняет карточку лота"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO lot_details (lot_id, body, fetched_at)
+                VALUES (?, ?, ?)
+            """, (str(lot_id), orjson.dumps(detail), time.time()))
+
+    def purge_expired(self, ttl: float = DETAIL_TTL) -> int:
+        """Удаляет устаревшие карточки, возвращает их количество"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute("DELETE FROM lot_details WHERE fetched_at < ?", (time.time() - ttl,))
+            return cursor.rowcount
+
+# Глобальный экземпляр
+torgi_detail_cache = TorgiDetailCache()
@@ -871,6 +871,12 @@ async def filter_offers_by_distance(
 
         logger.debug("Offer %s coordinates: lon=%.6f, lat=%.6f", offer.id, offer_coords[0], offer_coords[1])
 
+        # A route is never shorter than the straight line, so offers that are
+        # already too far by haversine are dropped without running OSMnx routing
+        if _haversine_km(lot_coords, offer_coords) > max_distance_km:
+            logger.debug("Exclude offer %s – straight-line distance exceeds %.1f km", offer.id, max_distance_km)
+            continue
+
         # Quick check for identical coordinates
         if offer_coords == lot_coords:
             dist_km = 0.1
@@ -1,7 +1,13 @@
 from __future__ import annotations
 import logging
-from typing import Any, List, Dict, Optional
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Iterator, List, Dict, Optional
+import orjson
 from googleapiclient.discovery import build
+from googleapiclient.model import JsonModel
 from google.oauth2 import service_account
 from core.models import Lot, Offer
 from core.config import CONFIG
@@ -11,8 +17,30 @@ logger = logging.getLogger(__name__)
 
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 
+
+class _OrjsonModel(JsonModel):
+    """Модель запросов googleapiclient, (де)сериализующая тела через orjson"""
+
+    def serialize(self, body_value):
+        if isinstance(body_value, dict) and "data" not in body_value and self._data_wrapper:
+            body_value = {"data": body_value}
+        return orjson.dumps(body_value).decode()
+
+    def deserialize(self, content):
+        # Ответы batchGet по целым листам — основная нагрузка на разбор JSON
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().deserialize(content)
+        if self._data_wrapper and isinstance(body, dict) and "data" in body:
+            body = body["data"]
+        return body
+
+
 _creds = service_account.Credentials.from_service_account_file(GSHEET_CREDS_PATH, scopes=SCOPES)
-_svc = build("sheets", "v4", credentials=_creds)
+_svc = build("sheets", "v4", credentials=_creds, model=_OrjsonModel())
+# Ресурс values() собирается googleapiclient заново при каждом обращении — создаём его один раз
+_values = _svc.spreadsheets().values()
 
 
 def _append(range_: str, values: List[List]):
@@ -23,7 +51,7 @@ def _append(range_: str, values: List[List]):
     
     try:
         logger.info(f"Добавление {len(values)} строк в диапазон {range_}")
-        response = _svc.spreadsheets().values().append(
+        response = _values.append(
             spreadsheetId=GSHEET_ID,
             range=range_, 
             valueInputOption="USER_ENTERED", 
@@ -581,7 +609,7 @@ def push_offers(sheet_name: str, offers: List[Offer]):
             _append(sheet_name, [headers])
         
         # Запрашиваем существующие данные для проверки на дубликаты
-        existing_data = _svc.spreadsheets().values().get(
+        existing_data = _values.get(
             spreadsheetId=GSHEET_ID,
             range=f"{sheet_name}!J2:J100000"  # Колонка с ID объявления
         ).execute()
@@ -602,7 +630,7 @@ def push_offers(sheet_name: str, offers: List[Offer]):
         logger.info(f"Добавление {len(new_offers)} новых объявлений из {len(valid_offers)} предоставленных")
         
         # Получаем текущий размер таблицы для определения номеров строк
-        range_data = _svc.spreadsheets().values().get(
+        range_data = _values.get(
             spreadsheetId=GSHEET_ID,
             range=f"{sheet_name}!A:A"
         ).execute()
@@ -716,7 +744,7 @@ def push_custom_data(sheet_name: str, rows: List[List[Any]]):
             _svc.spreadsheets().batchUpdate(spreadsheetId=GSHEET_ID, body=body).execute()
         
         # Очищаем лист и вставляем данные
-        _svc.spreadsheets().values().clear(
+        _values.clear(
             spreadsheetId=GSHEET_ID,
             range=sheet_name
         ).execute()
@@ -775,19 +803,19 @@ def setup_lots_all_header():
             logger.info(f"Лист {sheet_name} существует, обновляем заголовки")
             
             # Получаем текущие данные первой строки
-            result = _svc.spreadsheets().values().get(
+            result = _values.get(
                 spreadsheetId=GSHEET_ID,
                 range=f"{sheet_name}!A1:Z1"
             ).execute()
             
             # Очищаем первую строку
-            _svc.spreadsheets().values().clear(
+            _values.clear(
                 spreadsheetId=GSHEET_ID,
                 range=f"{sheet_name}!A1:Z1"
             ).execute()
             
             # Добавляем заголовки в первую строку
-            _svc.spreadsheets().values().update(
+            _values.update(
                 spreadsheetId=GSHEET_ID,
                 range=f"{sheet_name}!A1",
                 valueInputOption="USER_ENTERED",
@@ -849,7 +877,7 @@ def setup_lots_all_header():
             _svc.spreadsheets().batchUpdate(spreadsheetId=GSHEET_ID, body=body).execute()
             
             # Добавляем заголовки в первую строку
-            _svc.spreadsheets().values().update(
+            _values.update(
                 spreadsheetId=GSHEET_ID,
                 range=f"{sheet_name}!A1",
                 valueInputOption="USER_ENTERED",
@@ -911,13 +939,13 @@ def setup_cian_sale_all_header():
             logger.info(f"Лист {sheet_name} существует, обновляем заголовки")
             
             # Очищаем первую строку
-            _svc.spreadsheets().values().clear(
+            _values.clear(
                 spreadsheetId=GSHEET_ID,
                 range=f"{sheet_name}!A1:J1"
             ).execute()
             
             # Добавляем заголовки в первую строку
-            _svc.spreadsheets().values().update(
+            _values.update(
                 spreadsheetId=GSHEET_ID,
                 range=f"{sheet_name}!A1",
                 valueInputOption="USER_ENTERED",
@@ -979,7 +1007,7 @@ def setup_cian_sale_all_header():
             _svc.spreadsheets().batchUpdate(spreadsheetId=GSHEET_ID, body=body).execute()
             
             # Добавляем заголовки в первую строку
-            _svc.spreadsheets().values().update(
+            _values.update(
                 spreadsheetId=GSHEET_ID,
                 range=f"{sheet_name}!A1",
                 valueInputOption="USER_ENTERED",
@@ -1041,13 +1069,13 @@ def setup_cian_rent_all_header():
             logger.info(f"Лист {sheet_name} существует, обновляем заголовки")
             
             # Очищаем первую строку
-            _svc.spreadsheets().values().clear(
+            _values.clear(
                 spreadsheetId=GSHEET_ID,
                 range=f"{sheet_name}!A1:J1"
             ).execute()
             
             # Добавляем заголовки в первую строку
-            _svc.spreadsheets().values().update(
+            _values.update(
                 spreadsheetId=GSHEET_ID,
                 range=f"{sheet_name}!A1",
                 valueInputOption="USER_ENTERED",
@@ -1109,7 +1137,7 @@ def setup_cian_rent_all_header():
             _svc.spreadsheets().batchUpdate(spreadsheetId=GSHEET_ID, body=body).execute()
             
             # Добавляем заголовки в первую строку
-            _svc.spreadsheets().values().update(
+            _values.update(
                 spreadsheetId=GSHEET_ID,
                 range=f"{sheet_name}!A1",
                 valueInputOption="USER_ENTERED",
@@ -1161,117 +1189,257 @@ def setup_all_headers():
 
 setup_all_headers()
 
-def find_lot_by_uuid(lot_uuid: str) -> Optional[Lot]:
-    """Находит лот по UUID в таблице Google Sheets"""
-    try:
-        # Читаем данные из таблицы lots_all
-        result = _svc.spreadsheets().values().get(
+class _CachedIndex:
+    """Индекс по данным таблицы, который перечитывается не чаще раза в ttl секунд"""
+
+    # Общая для всех индексов: клиент _svc (httplib2) не потокобезопасен,
+    # а поиск вызывается из потоков (asyncio.to_thread в боте)
+    _lock = threading.Lock()
+
+    def __init__(self, load, ttl: float, reload_on_miss: bool = False):
+        self._load = load
+        self._ttl = ttl
+        self._reload_on_miss = reload_on_miss
+        self._index: Dict[str, Any] = {}
+        self._loaded_at: Optional[float] = None
+
+    def get(self, force: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            if force or self._loaded_at is None or time.monotonic() - self._loaded_at > self._ttl:
+                self._index = self._load()
+                self._loaded_at = time.monotonic()
+            return self._index
+
+    def lookup(self, key: str, default=None):
+        """
+        Ищет ключ. С reload_on_miss при промахе один раз перечитывает таблицу — данные
+        могли появиться после загрузки; без него новые данные подхватываются по ttl
+        """
+        value = self.get().get(key)
+        if value is None and self._reload_on_miss:
+            value = self.get(force=True).get(key)
+        return default if value is None else value
+
+    def refresh(self):
+        """Сбрасывает индекс, следующий поиск перечитает таблицу"""
+        with self._lock:
+            self._loaded_at = None
+
+
+# Индексы по UUID: поиск лота и аналогов — обращение к словарю, а не проход по всей таблице
+INDEX_TTL = 300  # секунд; бот работает долго, а парсер пополняет таблицы
+ANALOG_SHEETS = ["cian_sale_all", "cian_rent_all"]
+
+
+def _load_lot_index() -> Dict[str, List[str]]:
+    """Строит индекс UUID -> строка lots_all"""
+    result = _values.get(
+        spreadsheetId=GSHEET_ID,
+        range="lots_all!A2:AC"
+    ).execute()
+
+    index = {}
+    for row in result.get('values', []):
+        # UUID находится в колонке R (индекс 17); при дублях берём первую строку
+        if len(row) > 17 and row[17]:
+            index.setdefault(row[17], row)
+
+    logger.info(f"Индекс лотов обновлён: {len(index)} UUID")
+    return index
+
+
+def _load_analog_index() -> Dict[str, List[tuple]]:
+    """Строит индекс UUID лота -> [(лист, строка)] по листам аналогов, читая их одним batchGet"""
+    result = _values.batchGet(
+        spreadsheetId=GSHEET_ID,
+        ranges=[f"{sheet_name}!A:J" for sheet_name in ANALOG_SHEETS]  # Берем все основные колонки
+    ).execute()
+
+    index: Dict[str, List[tuple]] = {}
+    for sheet_name, value_range in zip(ANALOG_SHEETS, result.get('valueRanges', [])):
+        values = value_range.get('values', [])
+        if not values:
+            logger.info(f"Лист {sheet_name} пуст")
+            continue
+
+        headers = values[0]
+
+        # Находим индекс колонки с UUID лота
+        lot_uuid_column_index = None
+        for i, header in enumerate(headers):
+            if "UUID лота" in header or "lot_uuid" in header.lower():
+                lot_uuid_column_index = i
+                break
+
+        if lot_uuid_column_index is None:
+            logger.warning(f"Колонка UUID лота не найдена в листе {sheet_name}")
+            continue
+
+        for row in values[1:]:  # Пропускаем заголовки
+            if len(row) > lot_uuid_column_index and row[lot_uuid_column_index]:
+                index.setdefault(row[lot_uuid_column_index], []).append((sheet_name, row))
+
+        logger.info(f"Лист {sheet_name}: {len(values) - 1} строк")
+
+    return index
+
+
+# Промах по лоту — обычно лот, только что добавленный парсером, поэтому таблица перечитывается.
+# Лот без аналогов — штатный случай, перечитывать на нем оба листа аналогов незачем
+_lot_index = _CachedIndex(_load_lot_index, INDEX_TTL, reload_on_miss=True)
+_analog_index = _CachedIndex(_load_analog_index, INDEX_TTL)
+
+
+def refresh_lot_index():
+    """Сбрасывает индексы лотов и аналогов, следующий поиск перечитает таблицы"""
+    _lot_index.refresh()
+    _analog_index.refresh()
+
+
+def iter_lots_with_uuid(start_row: int = 2, batch: int = 500) -> Iterator[Dict[str, Any]]:
+    """
+    Постранично читает lots_all и отдаёт краткие сведения о лотах с UUID.
+
+    Следующая страница запрашивается только когда вызывающий дочитал текущую,
+    так что для первых нескольких лотов таблица целиком не загружается.
+    """
+    while True:
+        end_row = start_row + batch - 1
+        result = _values.get(
             spreadsheetId=GSHEET_ID,
-            range="lots_all!A2:AC1000"
+            range=f"lots_all!A{start_row}:R{end_row}"
         ).execute()
-        
+
         values = result.get('values', [])
-        
-        for row in values:
-            if len(row) < 18:  # Недостаточно колонок
-                continue
-                
-            try:
-                # UUID находится в колонке R (индекс 17)
-                if len(row) > 17 and row[17] == lot_uuid:
-                    
-                    # ИСПРАВЛЕНО: улучшенный парсинг площади
-                    def parse_area(area_str: str) -> float:
-                        """Парсит площадь из строки"""
-                        if not area_str:
-                            return 0.0
-                        
-                        try:
-                            # Убираем все символы кроме цифр, точек и запятых
-                            import re
-                            area_clean = re.sub(r'[^0-9.,]', '', area_str)
-                            area_clean = area_clean.replace(',', '.')
-                            
-                            # Если несколько точек, берем последнюю как десятичную
-                            if area_clean.count('.') > 1:
-                                parts = area_clean.split('.')
-                                area_clean = ''.join(parts[:-1]) + '.' + parts[-1]
-                            
-                            return float(area_clean) if area_clean else 0.0
-                        except:
-                            return 0.0
-                    
-                    # ИСПРАВЛЕНО: улучшенный парсинг цены
-                    def parse_price(price_str: str) -> float:
-                        """Парсит цену из строки"""
-                        if not price_str:
-                            return 0.0
-                        
-                        try:
-                            # Убираем все символы кроме цифр
-                            import re
-                            price_clean = re.sub(r'[^0-9]', '', price_str)
-                            return float(price_clean) if price_clean else 0.0
-                        except:
-                            return 0.0
-                    
-                    # Парсим данные из строки
-                    area = parse_area(row[5]) if len(row) > 5 else 0.0
-                    price = parse_price(row[8]) if len(row) > 8 else 0.0
-                    
-                    # Создаем объект лота
-                    lot = Lot(
-                        id=row[0] if len(row) > 0 else "",
-                        name=row[1] if len(row) > 1 else "",
-                        address=row[2] if len(row) > 2 else "",
-                        area=area,
-                        price=price,
-                        coords="55.7558,37.6176",  # Значения по умолчанию
-                        notice_number=row[15] if len(row) > 15 else "",
-                        lot_number=1,
-                        auction_type=row[14] if len(row) > 14 else "",
-                        sale_type="Продажа",
-                        law_reference="Федеральный закон №44-ФЗ",
-                        application_start=datetime.now(),
-                        application_end=datetime.now(),
-                        auction_start=datetime.now(),
-                        cadastral_number="",
-                        property_category=row[4] if len(row) > 4 else "",
-                        ownership_type="Государственная собственность",
-                        auction_step=0,
-                        deposit=0,
-                        recipient="",
-                        recipient_inn="",
-                        recipient_kpp="",
-                        bank_name="",
-                        bank_bic="",
-                        bank_account="",
-                        correspondent_account="",
-                        auction_url=row[16] if len(row) > 16 else "",
-                    )
-                    
-                    # Добавляем дополнительные метрики
-                    if len(row) > 25:
-                        lot.plus_rental = int(row[25]) if row[25].isdigit() else 0
-                        lot.plus_sale = int(row[26]) if len(row) > 26 and row[26].isdigit() else 0
-                        lot.plus_count = int(row[27]) if len(row) > 27 and row[27].isdigit() else 0
-                        lot.status = row[28] if len(row) > 28 else "acceptable"
-                    
-                    logger.info(f"✅ Найден лот по UUID {lot_uuid}: {lot.area} м², {lot.price:,.0f} ₽")
-                    return lot
-                    
-            except (ValueError, IndexError) as e:
-                logger.warning(f"Ошибка парсинга строки: {e}")
-                continue
-        
-        logger.warning(f"❌ Лот с UUID {lot_uuid} не найден")
-        return None
-        
+        for row_num, row in enumerate(values, start_row):
+            if len(row) > 17 and row[17]:  # Колонка R - UUID
+                yield {
+                    'row': row_num,
+                    'uuid': row[17],
+                    'name': row[1] if len(row) > 1 else '',
+                    'address': row[2] if len(row) > 2 else '',
+                    'area': row[5] if len(row) > 5 else '',
+                }
+
+        # Неполная страница — дальше данных нет
+        if len(values) < batch:
+            return
+        start_row = end_row + 1
+
+
+def _parse_area(area_str: str) -> float:
+    """Парсит площадь из строки"""
+    if not area_str:
+        return 0.0
+
+    try:
+        # Убираем все символы кроме цифр, точек и запятых
+        area_clean = re.sub(r'[^0-9.,]', '', area_str)
+        area_clean = area_clean.replace(',', '.')
+
+        # Если несколько точек, берем последнюю как десятичную
+        if area_clean.count('.') > 1:
+            parts = area_clean.split('.')
+            area_clean = ''.join(parts[:-1]) + '.' + parts[-1]
+
+        return float(area_clean) if area_clean else 0.0
+    except:
+        return 0.0
+
+
+def _parse_price(price_str: str) -> float:
+    """Парсит цену из строки"""
+    if not price_str:
+        return 0.0
+
+    try:
+        # Убираем все символы кроме цифр
+        price_clean = re.sub(r'[^0-9]', '', price_str)
+        return float(price_clean) if price_clean else 0.0
+    except:
+        return 0.0
+
+
+def _row_to_lot(row: List[str]) -> Lot:
+    """Собирает лот из строки lots_all"""
+    # Парсим данные из строки
+    area = _parse_area(row[5]) if len(row) > 5 else 0.0
+    price = _parse_price(row[8]) if len(row) > 8 else 0.0
+
+    # Создаем объект лота
+    lot = Lot(
+        id=row[0] if len(row) > 0 else "",
+        name=row[1] if len(row) > 1 else "",
+        address=row[2] if len(row) > 2 else "",
+        area=area,
+        price=price,
+        coords="55.7558,37.6176",  # Значения по умолчанию
+        notice_number=row[15] if len(row) > 15 else "",
+        lot_number=1,
+        auction_type=row[14] if len(row) > 14 else "",
+        sale_type="Продажа",
+        law_reference="Федеральный закон №44-ФЗ",
+        application_start=datetime.now(),
+        application_end=datetime.now(),
+        auction_start=datetime.now(),
+        cadastral_number="",
+        property_category=row[4] if len(row) > 4 else "",
+        ownership_type="Государственная собственность",
+        auction_step=0,
+        deposit=0,
+        recipient="",
+        recipient_inn="",
+        recipient_kpp="",
+        bank_name="",
+        bank_bic="",
+        bank_account="",
+        correspondent_account="",
+        auction_url=row[16] if len(row) > 16 else "",
+    )
+
+    # Добавляем дополнительные метрики
+    if len(row) > 25:
+        lot.plus_rental = int(row[25]) if row[25].isdigit() else 0
+        lot.plus_sale = int(row[26]) if len(row) > 26 and row[26].isdigit() else 0
+        lot.plus_count = int(row[27]) if len(row) > 27 and row[27].isdigit() else 0
+        lot.status = row[28] if len(row) > 28 else "acceptable"
+
+    return lot
+
+
+def find_lot_by_uuid(lot_uuid: str) -> Optional[Lot]:
+    """Находит лот по UUID в таблице Google Sheets"""
+    try:
+        row = _lot_index.lookup(lot_uuid)
+        if row is None:
+            logger.warning(f"❌ Лот с UUID {lot_uuid} не найден")
+            return None
+
+        try:
+            lot = _row_to_lot(row)
+        except (ValueError, IndexError) as e:
+            logger.warning(f"Ошибка парсинга строки: {e}")
+            return None
+
+        logger.info(f"✅ Найден лот по UUID {lot_uuid}: {lot.area} м², {lot.price:,.0f} ₽")
+        return lot
+
     except Exception as e:
         logger.error(f"❌ Ошибка поиска лота: {e}")
         return None
 
 
+def _safe_float(value) -> float:
+    """Безопасный парсинг чисел с запятыми"""
+    if not value:
+        return 0.0
+    try:
+        # Заменяем запятые на точки для парсинга float
+        return float(str(value).replace(',', '.'))
+    except:
+        return 0.0
+
+
 def find_analogs_in_sheets(lot_uuid: str, radius_km: float = 3.0) -> List[Offer]:
     """
     Поиск аналогов для лота по UUID в листах cian_sale_all и cian_rent_all
@@ -1287,71 +1455,23 @@ def find_analogs_in_sheets(lot_uuid: str, radius_km: float = 3.0) -> List[Offer]
         logger.info(f"Поиск аналогов для лота {lot_uuid} в Google Sheets")
         analogs = []
         
-        # Ищем в листах продаж и аренды
-        for sheet_name in ["cian_sale_all", "cian_rent_all"]:
+        for sheet_name, row in _analog_index.lookup(lot_uuid, []):
             try:
-                # Получаем данные из листа
-                result = _svc.spreadsheets().values().get(
-                    spreadsheetId=GSHEET_ID,
-                    range=f"{sheet_name}!A:J"  # Берем все основные колонки
-                ).execute()
-                
-                values = result.get('values', [])
-                if not values:
-                    logger.info(f"Лист {sheet_name} пуст")
-                    continue
-                
-                headers = values[0] if values else []
-                logger.info(f"Поиск в листе {sheet_name}, найдено {len(values)-1} строк")
-                
-                # Находим индекс колонки с UUID лота
-                lot_uuid_column_index = None
-                for i, header in enumerate(headers):
-                    if "UUID лота" in header or "lot_uuid" in header.lower():
-                        lot_uuid_column_index = i
-                        break
-                
-                if lot_uuid_column_index is None:
-                    logger.warning(f"Колонка UUID лота не найдена в листе {sheet_name}")
-                    continue
-                
-                # Ищем строки с нужным UUID лота
-                found_count = 0
-                for row in values[1:]:  # Пропускаем заголовки
-                    if len(row) > lot_uuid_column_index and row[lot_uuid_column_index] == lot_uuid:
-                        try:
-                            # Функция для безопасного парсинга чисел с запятыми
-                            def safe_float(value):
-                                if not value:
-                                    return 0.0
-                                try:
-                                    # Заменяем запятые на точки для парсинга float
-                                    return float(str(value).replace(',', '.'))
-                                except:
-                                    return 0.0
-                            
-                            # Создаем объект Offer из найденной строки
-                            offer = Offer(
-                                id=row[9] if len(row) > 9 else "",  # ID объявления
-                                lot_uuid=lot_uuid,
-                                price=safe_float(row[5]) if len(row) > 5 else 0.0,
-                                area=safe_float(row[3]) if len(row) > 3 else 0.0,
-                                url=row[7] if len(row) > 7 else "",
-                                type="sale" if "sale" in sheet_name else "rent",
-                                address=row[1] if len(row) > 1 else "",
-                                district=row[2] if len(row) > 2 else "",
-                                distance_to_lot=safe_float(row[6]) if len(row) > 6 else 0.0
-                            )
-                            analogs.append(offer)
-                            found_count += 1
-                        except Exception as e:
-                            logger.error(f"Ошибка при создании объекта Offer: {e}")
-                            continue
-                
-                logger.info(f"Найдено {found_count} аналогов в листе {sheet_name}")
-                
+                # Создаем объект Offer из найденной строки
+                offer = Offer(
+                    id=row[9] if len(row) > 9 else "",  # ID объявления
+                    lot_uuid=lot_uuid,
+                    price=_safe_float(row[5]) if len(row) > 5 else 0.0,
+                    area=_safe_float(row[3]) if len(row) > 3 else 0.0,
+                    url=row[7] if len(row) > 7 else "",
+                    type="sale" if "sale" in sheet_name else "rent",
+                    address=row[1] if len(row) > 1 else "",
+                    district=row[2] if len(row) > 2 else "",
+                    distance_to_lot=_safe_float(row[6]) if len(row) > 6 else 0.0
+                )
+                analogs.append(offer)
             except Exception as e:
-                logger.error(f"Ошибка при поиске в листе {sheet_name}: {e}")
+                logger.error(f"Ошибка при создании объекта Offer: {e}")
                 continue
         
         logger.info(f"Всего найдено {len(analogs)} аналогов для лота {lot_uuid}")
@@ -1375,7 +1495,7 @@ def _get_offers_from_sheet(sheet_name: str, lot_uuid: str, offer_type: str) -> L
     """
     try:
         # Получаем данные из таблицы
-        result = _svc.spreadsheets().values().get(
+        result = _values.get(
             spreadsheetId=GSHEET_ID,
             range=f"{sheet_name}!A:Z"
         ).execute()
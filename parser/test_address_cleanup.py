@@ -7,13 +7,19 @@
 """
 
 import re
+import sys
 import logging
-from typing import List, Optional, Tuple
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
 from core.gpt_tunnel_client import sync_chat
+from core.geocode_cache import geocode_cache, NEGATIVE_TTL
 
 # Тестируем без geopy сначала, если нужно - подключим
 try:
     from geopy.geocoders import Nominatim, Photon
+    from geopy.adapters import RequestsAdapter
     from geopy.exc import GeocoderTimedOut, GeocoderServiceError, GeocoderQuotaExceeded
     GEOPY_AVAILABLE = True
 except ImportError:
@@ -21,6 +27,110 @@ except ImportError:
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
+# Очистка адресов вызывается на каждый лот — по умолчанию пишем только предупреждения,
+# подробный лог включается через set_verbose()
+logger.setLevel(logging.WARNING)
+
+
+def set_verbose(verbose: bool = True) -> None:
+    """
+    Включает (или выключает) подробное логирование очистки и геокодирования адресов
+    """
+    logger.setLevel(logging.DEBUG if verbose else logging.WARNING)
+
+# Шаблоны извлечения компонентов адреса, общие для simplify_address_for_geocoding
+# и parse_address_components. Компилируются один раз при импорте модуля;
+# порядок в каждом списке — приоритет (побеждает первый совпавший шаблон).
+_CITY_PATTERNS = [
+    re.compile(r'городской округ\s+([А-Яа-яё\-]+)', re.IGNORECASE),
+    re.compile(r'г\s+([А-Яа-яё\-]+)', re.IGNORECASE),
+    re.compile(r'город\s+([А-Яа-яё\-]+)', re.IGNORECASE),
+    re.compile(r'пгт\s+([А-Яа-яё\s\-]+?)(?:,|$)', re.IGNORECASE),
+    re.compile(r'село\s+([А-Яа-яё\s\-]+?)(?:,|$)', re.IGNORECASE),
+    re.compile(r'с\s+([А-Яа-яё\s\-]+?)(?:,|$)', re.IGNORECASE),
+]
+
+# Поселки и села: те же шаблоны, но "городской округ" — последним
+_SETTLEMENT_PATTERNS = _CITY_PATTERNS[3:] + _CITY_PATTERNS[:1]
+
+_DISTRICT_PATTERNS = [
+    re.compile(r'([А-Яа-яё\-]+)\s+район', re.IGNORECASE),
+    re.compile(r'район\s+([А-Яа-яё\-]+)', re.IGNORECASE),
+]
+
+_STREET_PATTERNS = [
+    re.compile(r'ул\.?\s+([А-Яа-яё\s\-]+?)(?:,|\s+д|\s*$)', re.IGNORECASE),
+    re.compile(r'улица\s+([А-Яа-яё\s\-]+?)(?:,|\s+д|\s*$)', re.IGNORECASE),
+]
+
+_STREET_OBJECT_PATTERNS = _STREET_PATTERNS + [
+    re.compile(r'(Логистический Центр[^,]*)', re.IGNORECASE),
+    re.compile(r'([А-Яа-яё\s]+(?:Центр|центр)[^,]*)', re.IGNORECASE),
+    re.compile(r'тер\.?\s+([А-Яа-яё\s\-]+?)(?:,|\s*$)', re.IGNORECASE),
+    re.compile(r'территория\s+([А-Яа-яё\s\-]+?)(?:,|\s*$)', re.IGNORECASE),
+]
+
+_HOUSE_PATTERNS = [
+    re.compile(r'дом\s+(\d+[А-Яа-яёM]*)', re.IGNORECASE),
+    re.compile(r'д\.?\s+(\d+[А-Яа-яёM]*)', re.IGNORECASE),
+    re.compile(r',\s*(\d+[А-Яа-яёM]*)\s*$', re.IGNORECASE),
+]
+
+_REGION_RE = re.compile(r'(Московская область)', re.IGNORECASE)
+_REGION_ALT_RE = re.compile(r'область (Московская)', re.IGNORECASE)
+
+# Основные города Московской области: (в нижнем регистре, как выводим)
+_MAJOR_CITIES_LOWER = [
+    (city.lower(), city)
+    for city in ['Люберцы', 'Подольск', 'Химки', 'Балашиха', 'Мытищи', 'Коломна', 'Электросталь', 'Одинцово', 'Серпухов', 'Шаховская']
+]
+
+# Специфические объекты: (в нижнем регистре, как выводим)
+_SPECIFIC_OBJECTS_LOWER = [
+    (obj.lower(), obj)
+    for obj in ['Логистический Центр', 'Торговый Центр', 'Бизнес Центр', 'Промышленная зона', 'территория', 'тер.']
+]
+
+
+def _first_component(patterns, address: str) -> Optional[str]:
+    """
+    Возвращает первую группу первого совпавшего шаблона или None
+    """
+    for pattern in patterns:
+        match = pattern.search(address)
+        if match:
+            return match.group(1)
+    return None
+
+# Служебные шаблоны нормализации пробелов и запятых
+_WHITESPACE_RE = re.compile(r'\s+')
+_COMMA_SPACING_RE = re.compile(r'\s*,\s*')
+_EMPTY_SEGMENT_RE = re.compile(r'\s*,\s*,\s*')
+_EDGE_COMMA_RE = re.compile(r'^,\s*|,\s*$')
+_ENGLISH_NOISE_RE = re.compile(r'\b(oblast|street|house)\b')
+
+# Паттерны для очистки избыточных административных обозначений
+_ADMIN_CLEANUP_PATTERNS = [
+    # "г.о. Клин, г Клин" → "г Клин"
+    (re.compile(r'г\.о\.\s+([А-Яа-яё\-]+),?\s*г\s+\1', re.IGNORECASE), r'г \1'),
+    # "городской округ Клин, г Клин" → "г Клин"
+    (re.compile(r'городской округ\s+([А-Яа-яё\-]+),?\s*г\s+\1', re.IGNORECASE), r'г \1'),
+    # Убираем вн.тер.г.
+    (re.compile(r'вн\.тер\.г\.[^,]*,?\s*', re.IGNORECASE), ''),
+    # Убираем лишние административные единицы
+    (re.compile(r'муниципальный округ[^,]*,?\s*', re.IGNORECASE), ''),
+    (re.compile(r'административный округ[^,]*,?\s*', re.IGNORECASE), ''),
+    # Российская Федерация в начале
+    (re.compile(r'^Российская Федерация,?\s*', re.IGNORECASE), ''),
+]
+
+def _collapse_separators(text: str) -> str:
+    """
+    Схлопывает пробелы, приводит запятые к виду ", " и обрезает края строки
+    """
+    # split/join схлопывает пробелы в C быстрее любого регулярного выражения
+    text = _COMMA_SPACING_RE.sub(', ', ' '.join(text.split()))
+    return text.strip().strip(',').strip()
 
 def remove_redundant_admin(address: str) -> str:
     """
@@ -28,31 +138,41 @@ def remove_redundant_admin(address: str) -> str:
     ИСПРАВЛЕНО: г.о. + г Город → г Город
     """
     result = address
-    
-    # Паттерны для очистки
-    cleanup_patterns = [
-        # "г.о. Клин, г Клин" → "г Клин"
-        (r'г\.о\.\s+([А-Яа-яё\-]+),?\s*г\s+\1', r'г \1'),
-        # "городской округ Клин, г Клин" → "г Клин"
-        (r'городской округ\s+([А-Яа-яё\-]+),?\s*г\s+\1', r'г \1'),
-        # Убираем вн.тер.г.
-        (r'вн\.тер\.г\.[^,]*,?\s*', ''),
-        # Убираем лишние административные единицы
-        (r'муниципальный округ[^,]*,?\s*', ''),
-        (r'административный округ[^,]*,?\s*', ''),
-        # Российская Федерация в начале
-        (r'^Российская Федерация,?\s*', ''),
-    ]
-    
-    for pattern, replacement in cleanup_patterns:
-        result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
+    for pattern, replacement in _ADMIN_CLEANUP_PATTERNS:
+        result = pattern.sub(replacement, result)
     
     # Очищаем лишние запятые и пробелы
-    result = re.sub(r'\s*,\s*', ', ', result)
-    result = re.sub(r',+', ',', result)
-    result = result.strip().strip(',').strip()
+    return _collapse_separators(result)
+
+# Дубликаты областей, городов, районов и сел
+_DEDUPLICATE_PATTERNS = [
+    # Полные совпадения
+    (re.compile(r'Московская область[^,]*,\s*Московская область', re.IGNORECASE), 'Московская область'),
+    (re.compile(r'обл Московская[^,]*,\s*Московская область', re.IGNORECASE), 'Московская область'),
+    (re.compile(r'Российская Федерация[^,]*,\s*Московская область', re.IGNORECASE), 'Московская область'),
     
-    return result
+    # Города
+    (re.compile(r'г\s+([А-Яа-яё\-]+)[^,]*,\s*\1(?:\s+г|$)', re.IGNORECASE), r'г \1'),
+    (re.compile(r'город\s+([А-Яа-яё\-]+)[^,]*,\s*\1', re.IGNORECASE), r'город \1'),
+    
+    # Районы
+    (re.compile(r'([А-Яа-яё\-]+)\s+р-н[^,]*,\s*\1', re.IGNORECASE), r'\1'),
+    (re.compile(r'р-н\s+([А-Яа-яё\-]+)[^,]*,\s*\1', re.IGNORECASE), r'\1'),
+    
+    # Села/поселки
+    (re.compile(r'с\s+([А-Яа-яё\s\-]+)[^,]*,\s*с\s+\1', re.IGNORECASE), r'с \1'),
+    (re.compile(r'село\s+([А-Яа-яё\s\-]+)[^,]*,\s*\1', re.IGNORECASE), r'село \1'),
+    (re.compile(r'пгт\s+([А-Яа-яё\s\-]+)[^,]*,\s*\1', re.IGNORECASE), r'пгт \1'),
+]
+
+# Избыточные части адреса
+_REDUNDANT_PATTERNS = [
+    re.compile(r'Российская Федерация,?\s*', re.IGNORECASE),
+    re.compile(r'вн\.тер\.г\.[^,]*,?\s*', re.IGNORECASE),
+    re.compile(r'муниципальный округ[^,]*,?\s*', re.IGNORECASE),
+    re.compile(r'административный округ[^,]*,?\s*', re.IGNORECASE),
+    re.compile(r'городской округ(?!\s+[А-Яа-яё])[^,]*,?\s*', re.IGNORECASE),  # Не трогаем "городской округ Название"
+]
 
 def clean_duplicate_address_parts(address: str) -> str:
     """
@@ -61,85 +181,81 @@ def clean_duplicate_address_parts(address: str) -> str:
     if not address:
         return address
     
-    logger.info(f"🧹 ОЧИСТКА: '{address}'")
+    logger.debug("🧹 ОЧИСТКА: '%s'", address)
     
     # 1. Убираем полные дубликаты областей/регионов
     # "Московская область ... Московская область" → "Московская область"
-    patterns_to_deduplicate = [
-        # Полные совпадения
-        (r'Московская область[^,]*,\s*Московская область', 'Московская область'),
-        (r'обл Московская[^,]*,\s*Московская область', 'Московская область'),
-        (r'Российская Федерация[^,]*,\s*Московская область', 'Московская область'),
-        
-        # Города
-        (r'г\s+([А-Яа-яё\-]+)[^,]*,\s*\1(?:\s+г|$)', r'г \1'),
-        (r'город\s+([А-Яа-яё\-]+)[^,]*,\s*\1', r'город \1'),
-        
-        # Районы
-        (r'([А-Яа-яё\-]+)\s+р-н[^,]*,\s*\1', r'\1'),
-        (r'р-н\s+([А-Яа-яё\-]+)[^,]*,\s*\1', r'\1'),
-        
-        # Села/поселки
-        (r'с\s+([А-Яа-яё\s\-]+)[^,]*,\s*с\s+\1', r'с \1'),
-        (r'село\s+([А-Яа-яё\s\-]+)[^,]*,\s*\1', r'село \1'),
-        (r'пгт\s+([А-Яа-яё\s\-]+)[^,]*,\s*\1', r'пгт \1'),
-    ]
-    
     cleaned = address
-    for pattern, replacement in patterns_to_deduplicate:
+    for pattern, replacement in _DEDUPLICATE_PATTERNS:
         old_cleaned = cleaned
-        cleaned = re.sub(pattern, replacement, cleaned, flags=re.IGNORECASE)
-        if cleaned != old_cleaned:
-            logger.info(f"   🔄 Убрал дубликат: '{old_cleaned}' → '{cleaned}'")
+        cleaned = pattern.sub(replacement, cleaned)
+        if cleaned != old_cleaned and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("   🔄 Убрал дубликат: '%s' → '%s'", old_cleaned, cleaned)
     
     # 2. Убираем избыточные части
-    redundant_patterns = [
-        r'Российская Федерация,?\s*',
-        r'вн\.тер\.г\.[^,]*,?\s*',
-        r'муниципальный округ[^,]*,?\s*',
-        r'административный округ[^,]*,?\s*',
-        r'городской округ(?!\s+[А-Яа-яё])[^,]*,?\s*',  # Не трогаем "городской округ Название"
-    ]
-    
-    for pattern in redundant_patterns:
+    for pattern in _REDUNDANT_PATTERNS:
         old_cleaned = cleaned
-        cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
-        if cleaned != old_cleaned:
-            logger.info(f"   ✂️ Убрал избыточное: '{pattern}'")
+        cleaned = pattern.sub('', cleaned)
+        if cleaned != old_cleaned and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("   ✂️ Убрал избыточное: '%s'", pattern.pattern)
     
     # 3. Приводим к стандартному формату
     cleaned = standardize_address_format(cleaned)
     
     # 4. Убираем лишние пробелы и запятые
-    cleaned = re.sub(r'\s+', ' ', cleaned)
-    cleaned = re.sub(r'\s*,\s*', ', ', cleaned)
-    cleaned = re.sub(r',+', ',', cleaned)
-    cleaned = cleaned.strip().strip(',').strip()
+    cleaned = _collapse_separators(cleaned)
     
-    logger.info(f"✅ РЕЗУЛЬТАТ: '{cleaned}'")
+    logger.debug("✅ РЕЗУЛЬТАТ: '%s'", cleaned)
     return cleaned
 
+# Стандартные сокращения: токен адреса (в нижнем регистре) → замена
+_ABBREVIATIONS = {
+    'обл': 'область',
+    'обл.': 'область',
+    'г.о.': 'городской округ',
+    'г.о': 'городской округ',
+    'г': '',  # Отдельно стоящее "г." убираем — город определяется по названию
+    'г.': '',
+    'м.о.': '',
+    'м.о': '',
+    'р-н': 'район',
+    'р-н.': 'район',
+    'пгт': 'пгт',
+    'пгт.': 'пгт',
+    'с': 'село',
+    'с.': 'село',
+}
+
+# Токен — все, что между пробелами и запятыми; сами разделители не трогаем
+_ADDRESS_TOKEN_RE = re.compile(r'[^\s,]+')
+_HOUSE_NUMBER_RE = re.compile(r'\bд\.?\s*(\d)', re.IGNORECASE)
+
+def _expand_abbreviation(match: re.Match) -> str:
+    token = match.group(0)
+    lowered = token.lower()
+    if lowered in _ABBREVIATIONS:
+        return _ABBREVIATIONS[lowered]
+    
+    # Сокращение, слитное со следующим словом: "г.Клин", "обл.Московская", "г.о.Химки".
+    # Проверяем префиксы до точки, начиная с самого длинного
+    dot = lowered.rfind('.', 0, len(lowered) - 1)
+    while dot != -1:
+        prefix, rest = lowered[:dot + 1], token[dot + 1:]
+        if prefix in _ABBREVIATIONS and rest[0].isalpha():
+            expansion = _ABBREVIATIONS[prefix]
+            return f"{expansion} {rest}" if expansion else rest
+        dot = lowered.rfind('.', 0, dot)
+    return token
+
 def standardize_address_format(address: str) -> str:
     """
     Приводит адрес к стандартному формату: Область, Город, Объект/Улица
     """
-    # Стандартизируем сокращения
-    replacements = [
-        (r'\bобл\.?\s*', 'область '),
-        (r'\bг\.о\.?\s*', 'городской округ '),
-        (r'\bг\.?\s*(?![А-Яа-яё])', ''),  # Убираем "г." если после него не название
-        (r'\bм\.о\.?\s*', ''),
-        (r'\bр-н\.?\s*', 'район '),
-        (r'\bпгт\.?\s*', 'пгт '),
-        (r'\bс\.?\s+', 'село '),
-        (r'\bд\.?\s*(\d)', r'дом \1'),
-    ]
+    # Стандартизируем сокращения целыми токенами ("обл" → "область", но "область" не трогаем)
+    result = _ADDRESS_TOKEN_RE.sub(_expand_abbreviation, address)
     
-    result = address
-    for pattern, replacement in replacements:
-        result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
-    
-    return result
+    # "д.20", "д 20" → "дом 20"
+    return _HOUSE_NUMBER_RE.sub(r'дом \1', result)
 
 def simplify_address_for_geocoding(address: str) -> str:
     """
@@ -147,7 +263,7 @@ def simplify_address_for_geocoding(address: str) -> str:
     - Область + Город + Улица/Объект + Дом
     - Убирает все лишнее
     """
-    logger.info(f"🎯 УПРОЩЕНИЕ: '{address}'")
+    logger.debug("🎯 УПРОЩЕНИЕ: '%s'", address)
     
     # Сначала очищаем дубликаты
     cleaned = clean_duplicate_address_parts(address)
@@ -161,62 +277,23 @@ def simplify_address_for_geocoding(address: str) -> str:
     }
     
     # Регион
-    region_patterns = [
-        r'(Московская область)',
-        r'(московская область)',
-        r'область (Московская)',
-    ]
-    
-    for pattern in region_patterns:
-        match = re.search(pattern, cleaned, re.IGNORECASE)
-        if match:
-            components['region'] = 'Московская область'
-            break
+    if _REGION_RE.search(cleaned) or _REGION_ALT_RE.search(cleaned):
+        components['region'] = 'Московская область'
     
     # Город/населенный пункт
-    city_patterns = [
-        r'городской округ\s+([А-Яа-яё\-]+)',
-        r'г\s+([А-Яа-яё\-]+)',
-        r'город\s+([А-Яа-яё\-]+)',
-        r'пгт\s+([А-Яа-яё\s\-]+?)(?:,|$)',
-        r'село\s+([А-Яа-яё\s\-]+?)(?:,|$)',
-        r'с\s+([А-Яа-яё\s\-]+?)(?:,|$)',
-    ]
-    
-    for pattern in city_patterns:
-        match = re.search(pattern, cleaned, re.IGNORECASE)
-        if match:
-            components['city'] = match.group(1).strip()
-            break
+    city = _first_component(_CITY_PATTERNS, cleaned)
+    if city is not None:
+        components['city'] = city.strip()
     
     # Улица или специальный объект
-    street_object_patterns = [
-        r'ул\.?\s+([А-Яа-яё\s\-]+?)(?:,|\s+д|\s*$)',
-        r'улица\s+([А-Яа-яё\s\-]+?)(?:,|\s+д|\s*$)',
-        r'(Логистический Центр[^,]*)',
-        r'([А-Яа-яё\s]+(?:Центр|центр)[^,]*)',
-        r'тер\.?\s+([А-Яа-яё\s\-]+?)(?:,|\s*$)',
-        r'территория\s+([А-Яа-яё\s\-]+?)(?:,|\s*$)',
-    ]
-    
-    for pattern in street_object_patterns:
-        match = re.search(pattern, cleaned, re.IGNORECASE)
-        if match:
-            components['street_object'] = match.group(1).strip()
-            break
+    street_object = _first_component(_STREET_OBJECT_PATTERNS, cleaned)
+    if street_object is not None:
+        components['street_object'] = street_object.strip()
     
     # Номер дома
-    house_patterns = [
-        r'дом\s+(\d+[А-Яа-яёM]*)',
-        r'д\.?\s+(\d+[А-Яа-яёM]*)',
-        r',\s*(\d+[А-Яа-яёM]*)\s*$',
-    ]
-    
-    for pattern in house_patterns:
-        match = re.search(pattern, cleaned, re.IGNORECASE)
-        if match:
-            components['house'] = match.group(1)
-            break
+    house = _first_component(_HOUSE_PATTERNS, cleaned)
+    if house is not None:
+        components['house'] = house
     
     # Собираем упрощенный адрес
     simplified_parts = []
@@ -235,236 +312,211 @@ def simplify_address_for_geocoding(address: str) -> str:
     
     simplified = ', '.join(simplified_parts)
     
-    logger.info(f"✅ УПРОЩЕН: '{simplified}'")
+    logger.debug("✅ УПРОЩЕН: '%s'", simplified)
     return simplified
 
-def parse_address_components(address: str) -> dict:
+@dataclass(slots=True, frozen=True)
+class AddressComponents:
+    """Компоненты адреса для создания вариантов поиска"""
+    region: str = ''
+    main_city: str = ''  # Основной город (Люберцы, Подольск)
+    city: str = ''       # Любой населенный пункт
+    district: str = ''   # Район
+    street: str = ''
+    house: str = ''
+    specific_objects: Tuple[str, ...] = ()
+
+def parse_address_components(address: str) -> AddressComponents:
     """
     Парсит компоненты адреса для создания вариантов поиска
     """
-    components = {
-        'region': '',
-        'main_city': '',  # Основной город (Люберцы, Подольск)
-        'city': '',       # Любой населенный пункт
-        'district': '',   # Район
-        'street': '',
-        'house': '',
-        'specific_objects': []
-    }
+    region = ''
+    main_city = ''
+    city = ''
     
-    # Регион
-    region_match = re.search(r'(Московская область)', address, re.IGNORECASE)
+    # Регион (одна и та же строка на весь батч — интернируем)
+    region_match = _REGION_RE.search(address)
     if region_match:
-        components['region'] = region_match.group(1)
+        region = sys.intern(region_match.group(1))
+    
+    address_lower = address.lower()
     
     # Основные города Московской области
-    major_cities = ['Люберцы', 'Подольск', 'Химки', 'Балашиха', 'Мытищи', 'Коломна', 'Электросталь', 'Одинцово', 'Серпухов', 'Шаховская']
-    for city in major_cities:
-        if city.lower() in address.lower():
-            components['main_city'] = city
-            components['city'] = city
+    for city_lower, major_city in _MAJOR_CITIES_LOWER:
+        if city_lower in address_lower:
+            main_city = city = major_city
             break
     
     # Поселки и села
-    settlement_patterns = [
-        r'пгт\s+([А-Яа-яё\s\-]+?)(?:,|$)',
-        r'село\s+([А-Яа-яё\s\-]+?)(?:,|$)',
-        r'с\s+([А-Яа-яё\s\-]+?)(?:,|$)',
-        r'городской округ\s+([А-Яа-яё\-]+)',
-    ]
-    
-    for pattern in settlement_patterns:
-        match = re.search(pattern, address, re.IGNORECASE)
-        if match:
-            settlement = match.group(1).strip()
-            if not components['city']:
-                components['city'] = settlement
-            break
+    settlement = _first_component(_SETTLEMENT_PATTERNS, address)
+    if settlement is not None and not city:
+        city = settlement.strip()
     
     # Районы
-    district_patterns = [
-        r'([А-Яа-яё\-]+)\s+район',
-        r'район\s+([А-Яа-яё\-]+)',
-    ]
-    
-    for pattern in district_patterns:
-        match = re.search(pattern, address, re.IGNORECASE)
-        if match:
-            components['district'] = match.group(1).strip()
-            break
+    district = _first_component(_DISTRICT_PATTERNS, address)
     
     # Улицы
-    street_patterns = [
-        r'ул\.?\s+([А-Яа-яё\s\-]+?)(?:,|\s+д|\s*$)',
-        r'улица\s+([А-Яа-яё\s\-]+?)(?:,|\s+д|\s*$)',
-    ]
-    
-    for pattern in street_patterns:
-        match = re.search(pattern, address, re.IGNORECASE)
-        if match:
-            components['street'] = match.group(1).strip()
-            break
+    street = _first_component(_STREET_PATTERNS, address)
     
     # Специфические объекты
-    specific_objects = [
-        'Логистический Центр',
-        'Торговый Центр',
-        'Бизнес Центр',
-        'Промышленная зона',
-        'территория',
-        'тер.',
-    ]
-    
-    for obj in specific_objects:
-        if obj.lower() in address.lower():
-            components['specific_objects'].append(obj)
+    specific_objects = tuple(obj for obj_lower, obj in _SPECIFIC_OBJECTS_LOWER if obj_lower in address_lower)
     
     # Номер дома
-    house_patterns = [
-        r'дом\s+(\d+[А-Яа-яёM]*)',
-        r'д\.?\s+(\d+[А-Яа-яёM]*)',
-        r',\s*(\d+[А-Яа-яёM]*)\s*$',
-    ]
-    
-    for pattern in house_patterns:
-        match = re.search(pattern, address, re.IGNORECASE)
-        if match:
-            components['house'] = match.group(1)
-            break
-    
-    return components
+    house = _first_component(_HOUSE_PATTERNS, address)
+    
+    return AddressComponents(
+        region=region,
+        main_city=main_city,
+        city=city,
+        district=district.strip() if district is not None else '',
+        street=street.strip() if street is not None else '',
+        house=house or '',
+        specific_objects=specific_objects,
+    )
+
+# Специфические объекты, которые можно выбросить из адреса
+_SPECIFIC_OBJECT_PATTERNS = [
+    re.compile(r'Логистический Центр[^,]*', re.IGNORECASE),
+    re.compile(r'Торговый Центр[^,]*', re.IGNORECASE),
+    re.compile(r'Бизнес[- ]?Центр[^,]*', re.IGNORECASE),
+    re.compile(r'Промышленная зона[^,]*', re.IGNORECASE),
+    re.compile(r'тер\.?\s+[^,]*', re.IGNORECASE),
+    re.compile(r'территория\s+[^,]*', re.IGNORECASE),
+    re.compile(r'промзона[^,]*', re.IGNORECASE),
+]
 
 def remove_specific_objects(address: str) -> str:
     """
     Убирает специфические объекты из адреса
     """
-    objects_to_remove = [
-        r'Логистический Центр[^,]*',
-        r'Торговый Центр[^,]*',
-        r'Бизнес[- ]?Центр[^,]*',
-        r'Промышленная зона[^,]*',
-        r'тер\.?\s+[^,]*',
-        r'территория\s+[^,]*',
-        r'промзона[^,]*',
-    ]
-    
     result = address
-    for pattern in objects_to_remove:
-        result = re.sub(pattern, '', result, flags=re.IGNORECASE)
+    for pattern in _SPECIFIC_OBJECT_PATTERNS:
+        result = pattern.sub('', result)
     
     # Очищаем лишние запятые
-    result = re.sub(r'\s*,\s*,\s*', ', ', result)
-    result = re.sub(r'^,\s*|,\s*$', '', result)
+    result = _EMPTY_SEGMENT_RE.sub(', ', result)
+    result = _EDGE_COMMA_RE.sub('', result)
     result = result.strip()
     
     return result
 
-def create_address_variations(address: str) -> List[str]:
+def _iter_address_variations(address: str) -> Iterator[str]:
     """
-    Создает варианты адреса от самого точного до самого общего для каскадного поиска
-    ИСПРАВЛЕНО: Улучшенная логика без бессмысленного удаления номеров домов
+    Лениво выдает варианты адреса (с возможными повторами) от самого точного до самого общего
     """
-    variations = []
-    
-    # Парсим компоненты адреса
-    components = parse_address_components(address)
-    
     # 1. Полный адрес (как есть)
-    variations.append(address)
+    yield address
     
     # 2. Очищенный от дубликатов адрес
     cleaned = clean_duplicate_address_parts(address)
     if cleaned != address:
-        variations.append(cleaned)
+        yield cleaned
     
     # 3. Убираем избыточные административные единицы (г.о., вн.тер.г.)
     simplified_admin = remove_redundant_admin(address)
     if simplified_admin != address:
-        variations.append(simplified_admin)
+        yield simplified_admin
     
     # 4. Без специфических объектов (Логистический Центр, тер.)
     without_objects = remove_specific_objects(address)
     if without_objects != address:
-        variations.append(without_objects)
+        yield without_objects
+    
+    # Парсим компоненты адреса (нужны только для вариантов 5-10)
+    components = parse_address_components(address)
     
     # 5. Стандартный формат: Область, Город, Улица, Дом
-    if components['region'] and components['city'] and components['street']:
-        standard_format = f"{components['region']}, {components['city']}, {components['street']}"
-        if components['house']:
-            standard_format += f", {components['house']}"
-        variations.append(standard_format)
+    if components.region and components.city and components.street:
+        standard_format = f"{components.region}, {components.city}, {components.street}"
+        if components.house:
+            standard_format += f", {components.house}"
+        yield standard_format
     
     # 6. Только регион + город + улица (БЕЗ номера дома)
-    if components['region'] and components['city'] and components['street']:
-        no_house_format = f"{components['region']}, {components['city']}, {components['street']}"
-        variations.append(no_house_format)
+    if components.region and components.city and components.street:
+        yield f"{components.region}, {components.city}, {components.street}"
     
     # 7. Только город + улица
-    if components['city'] and components['street']:
-        city_street = f"{components['city']}, {components['street']}"
-        variations.append(city_street)
+    if components.city and components.street:
+        yield f"{components.city}, {components.street}"
     
     # 8. Только улица (если она информативная)
-    if components['street'] and len(components['street']) > 8:
-        variations.append(components['street'])
+    if components.street and len(components.street) > 8:
+        yield components.street
     
     # 9. Только регион + город
-    if components['region'] and components['city']:
-        region_city = f"{components['region']}, {components['city']}"
-        variations.append(region_city)
+    if components.region and components.city:
+        yield f"{components.region}, {components.city}"
     
     # 10. Только город
-    if components['city']:
-        variations.append(components['city'])
+    if components.city:
+        yield components.city
     
     # 11. Английские варианты для лучшего геокодирования
-    english_variants = create_english_variants(address)
-    variations.extend(english_variants)
+    yield from create_english_variants(address)
+
+def create_address_variations(address: str, limit: Optional[int] = None) -> List[str]:
+    """
+    Создает варианты адреса от самого точного до самого общего для каскадного поиска
+    ИСПРАВЛЕНО: Улучшенная логика без бессмысленного удаления номеров домов
     
-    # Убираем дубликаты, сохраняя порядок
-    unique_variations = []
-    for var in variations:
-        cleaned_var = var.strip().strip(',').strip()
-        if cleaned_var and cleaned_var not in unique_variations and len(cleaned_var) > 3:
-            unique_variations.append(cleaned_var)
+    Args:
+        limit: сколько уникальных вариантов нужно; остальные даже не строятся (None — все)
+    """
+    def unique_variations():
+        # Убираем дубликаты, сохраняя порядок
+        seen = set()
+        for var in _iter_address_variations(address):
+            cleaned_var = var.strip().strip(',').strip()
+            if len(cleaned_var) > 3 and cleaned_var not in seen:
+                seen.add(cleaned_var)
+                yield cleaned_var
     
-    return unique_variations
+    return list(islice(unique_variations(), limit))
+
+# Словарь переводов для английских вариантов (ключи в нижнем регистре)
+_ENGLISH_TRANSLATIONS = {
+    'московская область': 'Moscow Oblast',
+    'область': 'Oblast',
+    'клин': 'Klin',
+    'химки': 'Khimki',
+    'подольск': 'Podolsk',
+    'москва': 'Moscow',
+    'россия': 'Russia',
+    'улица': 'street',
+    'ул': 'street',
+    'проспект': 'avenue',
+    'пр-т': 'avenue',
+    'дом': 'house',
+    'д': 'house',
+    'гагарина': 'Gagarina',
+    'правды': 'Pravdy',
+    'тверская': 'Tverskaya',
+    'новогиреевская': 'Novogireevskaya',
+}
+
+# Все переводы за один проход; длинные ключи первыми, чтобы
+# "московская область" не разбивалась на "область", а "правды" — на "д"
+_ENGLISH_TRANSLATION_RE = re.compile(
+    '|'.join(sorted(map(re.escape, _ENGLISH_TRANSLATIONS), key=len, reverse=True))
+)
+
 def create_english_variants(address: str) -> List[str]:
     """
     Создает английские варианты адреса для лучшего геокодирования
     """
     variants = []
     
-    # Словарь переводов
-    translations = {
-        'московская область': 'Moscow Oblast',
-        'область': 'Oblast',
-        'клин': 'Klin',
-        'химки': 'Khimki',
-        'подольск': 'Podolsk',
-        'москва': 'Moscow',
-        'россия': 'Russia',
-        'улица': 'street',
-        'ул': 'street',
-        'проспект': 'avenue',
-        'пр-т': 'avenue',
-        'дом': 'house',
-        'д': 'house',
-        'гагарина': 'Gagarina',
-        'правды': 'Pravdy',
-        'тверская': 'Tverskaya',
-        'новогиреевская': 'Novogireevskaya',
-    }
-    
     # Создаем английский вариант
-    english_address = address.lower()
-    for ru, en in translations.items():
-        english_address = english_address.replace(ru, en)
+    address_lower = address.lower()
+    english_address = _ENGLISH_TRANSLATION_RE.sub(
+        lambda match: _ENGLISH_TRANSLATIONS[match.group(0)], address_lower
+    )
     
-    if english_address != address.lower():
+    if english_address != address_lower:
         # Убираем лишние слова
-        english_clean = re.sub(r'\b(oblast|street|house)\b', '', english_address)
-        english_clean = re.sub(r'\s+', ' ', english_clean).strip()
+        english_clean = _ENGLISH_NOISE_RE.sub('', english_address)
+        english_clean = _WHITESPACE_RE.sub(' ', english_clean).strip()
         
         variants.extend([
             english_address.title(),
@@ -534,26 +586,35 @@ def gpt_clean_address(address: str) -> str:
         logger.error(f"🤖 Ошибка GPT: {e}")
         return address
 
+# Один геокодер на процесс: его requests.Session держит keep-alive соединения,
+# и TLS-рукопожатие не повторяется на каждый вариант адреса
+_shared_geocoder = None
+
 def create_fixed_geocoder():
     """
-    Создает исправленный геокодер без проблемы языка
+    Возвращает исправленный геокодер без проблемы языка (общий для всех вызовов)
     """
+    global _shared_geocoder
+    
     if not GEOPY_AVAILABLE:
         return None
     
-    # ИСПРАВЛЕННАЯ конфигурация геокодера
-    geocoder = Nominatim(
-        user_agent="commercial_real_estate_fixed/1.0",  # Русский только в user_agent
-        timeout=30,
-        domain='nominatim.openstreetmap.org'
-        # НЕ ИСПОЛЬЗУЕМ language='ru' !!!
-    )
+    if _shared_geocoder is None:
+        # ИСПРАВЛЕННАЯ конфигурация геокодера
+        _shared_geocoder = Nominatim(
+            user_agent="commercial_real_estate_fixed/1.0",  # Русский только в user_agent
+            timeout=30,
+            domain='nominatim.openstreetmap.org',
+            # НЕ ИСПОЛЬЗУЕМ language='ru' !!!
+            adapter_factory=partial(RequestsAdapter, pool_maxsize=16),
+        )
     
-    return geocoder
+    return _shared_geocoder
 
 def enhanced_address_search(geocoder, address: str, max_attempts: int = 6) -> Optional[tuple]:
     """
     Улучшенный поиск адреса с каскадной стратегией
+    Результаты (и окончательные промахи) кэшируются на диске по нормализованному адресу
     
     Returns:
         tuple: (latitude, longitude, found_address, used_variation) или None
@@ -561,13 +622,22 @@ def enhanced_address_search(geocoder, address: str, max_attempts: int = 6) -> Op
     if not address:
         return None
     
-    logger.info(f"🔍 ENHANCED SEARCH: '{address}'")
+    logger.debug("🔍 ENHANCED SEARCH: '%s'", address)
+    
+    # Ключ — адрес после очистки дубликатов и сокращений: разные записи
+    # одного адреса попадают в одну запись кэша, но информация не теряется
+    cache_key = clean_duplicate_address_parts(address).lower() or address.strip().lower()
+    is_hit, cached = geocode_cache.get(cache_key)
+    if is_hit:
+        logger.debug("   💾 Из кэша: '%s'", cache_key)
+        return tuple(cached) if cached else None
     
     # Создаем варианты поиска
-    variations = create_address_variations(address)[:max_attempts]
+    variations = create_address_variations(address, limit=max_attempts)
+    had_errors = False
     
     for i, variation in enumerate(variations, 1):
-        logger.info(f"   Попытка {i}/{len(variations)}: '{variation}'")
+        logger.debug("   Попытка %d/%d: '%s'", i, len(variations), variation)
         
         try:
             location = geocoder.geocode(
@@ -579,16 +649,22 @@ def enhanced_address_search(geocoder, address: str, max_attempts: int = 6) -> Op
             )
             
             if location:
-                logger.info(f"   ✅ НАЙДЕНО! Использован вариант: '{variation}'")
-                return (location.latitude, location.longitude, location.address, variation)
+                logger.debug("   ✅ НАЙДЕНО! Использован вариант: '%s'", variation)
+                result = (location.latitude, location.longitude, location.address, variation)
+                geocode_cache.set(cache_key, result)
+                return result
             else:
-                logger.info(f"   ❌ Вариант {i} не найден")
+                logger.debug("   ❌ Вариант %d не найден", i)
                 
         except Exception as e:
-            logger.warning(f"   ❌ Ошибка в варианте {i}: {e}")
+            logger.warning("   ❌ Ошибка в варианте %d: %s", i, e)
+            had_errors = True
             continue
     
-    logger.warning(f"❌ ALL ENHANCED ATTEMPTS failed: '{address}'")
+    logger.warning("❌ ALL ENHANCED ATTEMPTS failed: '%s'", address)
+    # Промах кэшируем только если геокодер честно ответил "не найдено" на все варианты
+    if not had_errors:
+        geocode_cache.set(cache_key, None, ttl=NEGATIVE_TTL)
     return None
 
 def test_address_cleaning():
@@ -627,6 +703,22 @@ def test_address_cleaning():
         print(f"GPT:      {gpt_cleaned}")
         print("-" * 100)
 
+def test_standardize_address_format():
+    """
+    Проверяет раскрытие сокращений, в том числе слитных со следующим словом
+    """
+    cases = {
+        "обл Московская, г Химки, ул Загородная, д 4": "область Московская,  Химки, ул Загородная, дом 4",
+        "обл.Московская, г.Клин, с.Ивановка": "область Московская, Клин, село Ивановка",
+        "г.о.Химки, р-н.Южный": "городской округ Химки, район Южный",
+        "Московская область, Шаховской р-н": "Московская область, Шаховской район",
+        "ул.Тверская, д.7": "ул.Тверская, дом 7",
+    }
+    
+    for address, expected in cases.items():
+        result = standardize_address_format(address)
+        assert result == expected, f"{address!r}: {result!r} != {expected!r}"
+
 def test_address_variations():
     """
     Тестирует создание вариантов адресов
@@ -823,6 +915,8 @@ def test_fixed_geocoding():
             print(f"   ❌ Каскадный поиск тоже не дал результата")
 
 if __name__ == "__main__":
+    set_verbose()
+    
     print("🧪 ТЕСТОВЫЙ СКРИПТ ИСПРАВЛЕНИЯ АДРЕСОВ")
     print("=" * 60)
     
@@ -3,7 +3,9 @@
 Сбор geo-ID Циана для Москвы и МО с параметром --base.
 """
 
-import aiohttp, asyncio, re, json, argparse
+import aiohttp, asyncio, sys, argparse
+import orjson
+from collections import defaultdict
 from pathlib import Path
 from aiohttp import ClientResponseError, TCPConnector
 
@@ -11,6 +13,8 @@ from aiohttp import ClientResponseError, TCPConnector
 STEP_REGIONS = 1000
 STEP_STREETS = 10000
 DUMP_FILENAME = "moscow_mo_geo.json"
+FETCH_RETRIES = 5
+DUMP_CHUNK = 10000
 
 # Заголовки
 HEADERS = {
@@ -22,23 +26,25 @@ HEADERS = {
         "Chrome/126.0 Safari/537.36"
     ),
     "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate, br",
     "Accept-Language": "ru,en;q=0.9",
     "Referer": "https://www.cian.ru/"
 }
 
 
 async def _fetch(session, base, endpoint, **params):
-    """GET с retry на 503/504."""
+    """GET с retry на 503/504 (экспоненциальная пауза, не больше FETCH_RETRIES попыток)."""
     url = f"{base}/{endpoint}"
-    try:
-        async with session.get(url, params=params, headers=HEADERS) as r:
-            r.raise_for_status()
-            return await r.json()
-    except ClientResponseError as e:
-        if e.status in (503, 504):
-            await asyncio.sleep(0.5)
-            return await _fetch(session, base, endpoint, **params)
-        raise
+    for attempt in range(FETCH_RETRIES):
+        try:
+            async with session.get(url, params=params, headers=HEADERS) as r:
+                r.raise_for_status()
+                return await r.json(loads=orjson.loads)
+        except ClientResponseError as e:
+            if e.status in (503, 504) and attempt < FETCH_RETRIES - 1:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+            raise
 
 
 async def _paginate(session, base, endpoint, step, **params):
@@ -84,8 +90,15 @@ async def _download_all(session, base, dump_path: Path):
     # МО: города и районы (type=2,3)
     mo_ps  = await _collect_regions(session, base, mo_id, 2, 3)
 
+    regions = msk_ds + mo_ps
+    # Улицы всех регионов запрашиваются параллельно (ограничение — limit_per_host коннектора)
+    streets_per_region = await asyncio.gather(
+        *[_collect_streets(session, base, reg["id"]) for reg in regions],
+        return_exceptions=True
+    )
+
     all_objs = []
-    for reg in msk_ds + mo_ps:
+    for reg, streets in zip(regions, streets_per_region):
         obj_type = "район" if reg["parentId"] == msk_id else "нас.пункт"
         all_objs.append({
             "id":       reg["id"],
@@ -93,26 +106,45 @@ async def _download_all(session, base, dump_path: Path):
             "type":     obj_type,
             "parentId": reg["parentId"]
         })
-        try:
-            for st in await _collect_streets(session, base, reg["id"]):
-                all_objs.append({
-                    "id":       st["id"],
-                    "name":     st["name"],
-                    "type":     "улица",
-                    "parentId": st["regionId"]
-                })
-        except Exception as e:
-            print(f"⚠️  Пропущена улица для {reg['name']} ({reg['id']}): {e}")
-
-    dump_path.write_text(json.dumps(all_objs, ensure_ascii=False, indent=2), "utf-8")
+        if isinstance(streets, BaseException):
+            if not isinstance(streets, Exception):
+                raise streets
+            print(f"⚠️  Пропущена улица для {reg['name']} ({reg['id']}): {streets}")
+            continue
+        for st in streets:
+            all_objs.append({
+                "id":       st["id"],
+                "name":     st["name"],
+                "type":     "улица",
+                "parentId": st["regionId"]
+            })
+
+    _write_dump(dump_path, all_objs)
     return all_objs
 
 
+def _write_dump(dump_path: Path, objs):
+    """
+    Пишет JSON-массив кусками по DUMP_CHUNK объектов: в памяти одновременно
+    только один сериализованный кусок, а не весь дамп. Результат побайтно
+    совпадает с orjson.dumps(objs, option=OPT_INDENT_2).
+    """
+    with dump_path.open("wb") as f:
+        f.write(b"[")
+        for start in range(0, len(objs), DUMP_CHUNK):
+            chunk = orjson.dumps(objs[start:start + DUMP_CHUNK], option=orjson.OPT_INDENT_2)
+            f.write(b",\n" if start else b"\n")
+            f.write(memoryview(chunk)[2:-2])  # без "[\n" и "\n]" куска
+        f.write(b"\n]" if objs else b"]")
+
+
 def _build_index(items):
-    idx = {}
+    """Индекс имя (lower) → объекты. Имена сильно повторяются, поэтому интернируем ключи."""
+    idx = defaultdict(list)
+    intern = sys.intern
     for o in items:
-        idx.setdefault(o["name"].lower(), []).append(o)
-    return idx
+        idx[intern(o["name"].lower())].append(o)
+    return dict(idx)
 
 
 def find_location(query: str, index):
@@ -120,9 +152,9 @@ def find_location(query: str, index):
     exact = index.get(q, [])
     if exact:
         return exact
-    pat = re.escape(q)
+    # Экранированный шаблон искал обычную подстроку — это делает `in` без regex
     return [o for name, lst in index.items()
-            if re.search(pat, name)
+            if q in name
             for o in lst]
 
 
@@ -139,10 +171,10 @@ async def main():
     base = args.base.rstrip("/")
 
     if args.skip_fetch and dump.exists():
-        items = json.loads(dump.read_text("utf-8"))
+        items = orjson.loads(dump.read_bytes())
     else:
         print(f"⏬  Загружаем с {base} …")
-        async with aiohttp.ClientSession(connector=TCPConnector(limit_per_host=2)) as sess:
+        async with aiohttp.ClientSession(connector=TCPConnector(limit=100, limit_per_host=16, ttl_dns_cache=300, keepalive_timeout=60)) as sess:
             items = await _download_all(sess, base, dump)
         print(f"✅  Сохранено {len(items):,} объектов → {dump}")
 
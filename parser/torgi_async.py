@@ -1,20 +1,24 @@
 from __future__ import annotations
 import asyncio
-import json
 import logging
 import random
+import re
 import time
+from functools import lru_cache
+from itertools import cycle
 from datetime import datetime, timezone
 from typing import Any, Dict, List
 
 import aiohttp
-from aiohttp.client_exceptions import ClientHttpProxyError, ContentTypeError
+import orjson
+from aiohttp.client_exceptions import ClientHttpProxyError
 
 from dateutil.parser import isoparse
 from parser.proxy_pool import get as proxy_get, drop as proxy_drop
 from parser.config import PAGELOAD_TIMEOUT
 from parser.retry import retry
 from core.models import Lot
+from core.torgi_detail_cache import torgi_detail_cache
 
 logger = logging.getLogger(__name__)
 
@@ -35,88 +39,178 @@ UAS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125 Safari/537.36",
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17 Safari/605.1.15",
 ]
+# User-Agent выбирается на сессию; при повторных попытках берется следующий по кругу
+_UA_CYCLE = cycle(UAS)
 
-async def _attempt(session: aiohttp.ClientSession, url: str, proxy: str | None) -> Dict[str, Any]:
+# Ограничение частоты запросов к torgi.gov.ru вместо фиксированных пауз между страницами
+REQUESTS_PER_SECOND = 5
+REQUESTS_BURST = 10
+
+class _TokenBucket:
+    """Token bucket: в среднем не больше rate запросов в секунду, всплеск до burst."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        # Между проверкой и списанием токена нет await, поэтому в одном event loop блокировка не нужна
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+_LIMITER = _TokenBucket(REQUESTS_PER_SECOND, REQUESTS_BURST)
+
+async def _attempt(session: aiohttp.ClientSession, url: str, proxy: str | None,
+                   headers: Dict[str, str] | None = None) -> Dict[str, Any]:
     """Одна попытка запроса. Бросает исключения, если JSON не получился."""
-    async with session.get(url, proxy=proxy) as resp:
+    await _LIMITER.acquire()
+    async with session.get(url, proxy=proxy, headers=headers) as resp:
         if resp.status in (403, 407):
             raise ClientHttpProxyError(req_info=resp.request_info, history=(), code=resp.status, message="proxy block!")
+        # API отдает UTF-8: разбираем байты напрямую, без определения кодировки и decode
+        raw = await resp.read()
         try:
-            data = await resp.json(content_type=None)
-        except (ContentTypeError, json.JSONDecodeError) as e:
+            data = orjson.loads(raw)
+        except orjson.JSONDecodeError as e:
             raise ValueError(f"Non-JSON response: {e}") from e
         if not isinstance(data, dict):
             raise ValueError("JSON root is not an object")
         return data
 
+# Общая сессия на все запросы: соединения (DNS, TCP, TLS) переиспользуются
+# между страницами и карточками лотов вместо установки заново на каждый запрос.
+# Живет ровно столько, сколько вызов fetch_lots, поэтому всегда закрывается в своем event loop
+_session: aiohttp.ClientSession | None = None
+
+def _open_session() -> aiohttp.ClientSession:
+    """Создает сессию для одной загрузки лотов."""
+    connector = aiohttp.TCPConnector(limit=64, limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=60)
+    timeout = aiohttp.ClientTimeout(total=10, connect=5)  # 5 сек на соединение, 10 сек всего
+    return aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                 headers={"User-Agent": random.choice(UAS),
+                                          "Accept-Encoding": "gzip, deflate, br"})
+
+def _get_session() -> aiohttp.ClientSession:
+    """Возвращает сессию текущей загрузки."""
+    if _session is None or _session.closed:
+        raise RuntimeError("Сессия torgi не открыта: запросы выполняются только внутри fetch_lots")
+    return _session
+
 @retry()
 async def _fetch_json(url: str) -> Dict[str, Any]:
     """Получение JSON с учетом прокси и повторных попыток."""
-    headers = {"User-Agent": random.choice(UAS)}
-    timeout = aiohttp.ClientTimeout(total=10, connect=5)  # 5 сек на соединение, 10 сек всего
-    async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
-        # Сначала пробуем через прокси
-        tried: set[str] = set()
-        while True:
-            proxy = proxy_get()
-            if not proxy or proxy in tried:
-                break
-            tried.add(proxy)
-            try:
-                return await _attempt(session, url, proxy)
-            except ClientHttpProxyError:
-                logger.warning("Прокси %s заблокирован → удаляем", proxy)
-                proxy_drop(proxy)
-            except Exception as e:
-                logger.warning("Прокси %s ошибка: %s → удаляем", proxy, e)
-                proxy_drop(proxy)
-
-        # Если прокси не сработали, пробуем напрямую
-        return await _attempt(session, url, None)
-
-def _char(chars: list[dict[str, Any]], code: str, default: Any = "") -> Any:
-    """Извлекает значение характеристики по коду из списка характеристик."""
-    return next((c["characteristicValue"] for c in chars if c.get("code") == code), default)
+    session = _get_session()
+    # Первая попытка идет с User-Agent сессии, повторные — со сменой UA
+    headers: Dict[str, str] | None = None
+
+    # Сначала пробуем через прокси
+    tried: set[str] = set()
+    while True:
+        proxy = proxy_get()
+        if not proxy or proxy in tried:
+            break
+        tried.add(proxy)
+        try:
+            return await _attempt(session, url, proxy, headers)
+        except ClientHttpProxyError:
+            logger.warning("Прокси %s заблокирован → удаляем", proxy)
+            proxy_drop(proxy)
+        except Exception as e:
+            logger.warning("Прокси %s ошибка: %s → удаляем", proxy, e)
+            proxy_drop(proxy)
+        headers = {"User-Agent": next(_UA_CYCLE)}
+
+    # Если прокси не сработали, пробуем напрямую
+    return await _attempt(session, url, None, headers)
+
+def _char_map(chars: list[dict[str, Any]]) -> dict[str, Any]:
+    """Словарь характеристик лота {код: значение} за один проход (при повторах кода берется первое)."""
+    return {c["code"]: c.get("characteristicValue") for c in reversed(chars) if "code" in c}
+
+def _num(value: Any) -> float:
+    """Числовое поле API в float: float берется как есть, пустое значение/None → 0.0."""
+    if value.__class__ is float:
+        return value
+    return float(value) if value else 0.0
+
+@lru_cache(maxsize=4096)
+def _parse_dt(value: str) -> datetime:
+    """Дата из API в UTC. Даты часто повторяются у лотов одного извещения, поэтому кэшируем."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        # Редкие форматы, которые не понимает fromisoformat
+        parsed = isoparse(value)
+    return parsed.astimezone(timezone.utc)
 
 def _to_lot(d: dict[str, Any]) -> Lot:
     """Преобразует JSON-данные лота в объект Lot."""
-    chars = d.get("characteristics", [])
-    area = float(_char(chars, "totalAreaRealty", 0))
+    cmap = _char_map(d.get("characteristics", []))
+    area = _num(cmap.get("totalAreaRealty"))
     if area > 60:
-        
-        dt = lambda k: isoparse(d[k]).astimezone(timezone.utc) if d.get(k) else datetime.now(timezone.utc)
+        now = datetime.now(timezone.utc)
+        dt = lambda k: _parse_dt(d[k]) if d.get(k) else now
+        # Позиционные аргументы в порядке полей Lot (быстрее 27 именованных)
         return Lot(
-            id=str(d["id"]),
-            name=d.get("lotName", ""),
-            address=d.get("estateAddress", ""),
-            coords=None,
-            area=area,
-            price=d.get("priceMin", 0.0),
-            notice_number=d.get("noticeNumber", ""),
-            lot_number=d.get("lotNumber", 0),
-            auction_type=d.get("biddForm", {}).get("name", ""),
-            sale_type=d.get("biddType", {}).get("name", ""),
-            law_reference=d.get("npaHintCode", ""),
-            application_start=dt("biddStartTime"),
-            application_end=dt("biddEndTime"),
-            auction_start=dt("auctionStartDate"),
-            cadastral_number=_char(chars, "cadastralNumberRealty", ""),
-            property_category=d.get("category", {}).get("name", ""),
-            ownership_type=d.get("ownershipForm", {}).get("name", ""),
-            auction_step=d.get("priceStep", 0.0),
-            deposit=d.get("deposit", 0.0),
-            recipient=d.get("depositRecipientName", ""),
-            recipient_inn=d.get("depositRecipientINN", ""),
-            recipient_kpp=d.get("depositRecipientKPP", ""),
-            bank_name=d.get("depositBankName", ""),
-            bank_bic=d.get("depositBIK", ""),
-            bank_account=d.get("depositPayAccount", ""),
-            correspondent_account=d.get("depositCorAccount", ""),
-            auction_url=PUBLIC.format(d["id"]),
+            str(d["id"]),  # id
+            d.get("lotName", ""),  # name
+            d.get("estateAddress", ""),  # address
+            None,  # coords
+            area,  # area
+            _num(d.get("priceMin")),  # price
+            d.get("noticeNumber", ""),  # notice_number
+            d.get("lotNumber", 0),  # lot_number
+            d.get("biddForm", {}).get("name", ""),  # auction_type
+            d.get("biddType", {}).get("name", ""),  # sale_type
+            d.get("npaHintCode", ""),  # law_reference
+            dt("biddStartTime"),  # application_start
+            dt("biddEndTime"),  # application_end
+            dt("auctionStartDate"),  # auction_start
+            cmap.get("cadastralNumberRealty", ""),  # cadastral_number
+            d.get("category", {}).get("name", ""),  # property_category
+            d.get("ownershipForm", {}).get("name", ""),  # ownership_type
+            _num(d.get("priceStep")),  # auction_step
+            _num(d.get("deposit")),  # deposit
+            d.get("depositRecipientName", ""),  # recipient
+            d.get("depositRecipientINN", ""),  # recipient_inn
+            d.get("depositRecipientKPP", ""),  # recipient_kpp
+            d.get("depositBankName", ""),  # bank_name
+            d.get("depositBIK", ""),  # bank_bic
+            d.get("depositPayAccount", ""),  # bank_account
+            d.get("depositCorAccount", ""),  # correspondent_account
+            PUBLIC.format(d["id"]),  # auction_url
         )
     else:
         logger.info(f"Пропуск лота с площадью {area}м² (меньше 60м²)")
 
+# Сколько карточек лотов запрашивается одновременно
+DETAIL_CONCURRENCY = 8
+
+async def _fetch_details(lot_ids: List[Any]) -> List[Dict[str, Any] | BaseException]:
+    """Параллельно загружает карточки лотов; ошибки возвращаются на месте результата."""
+    semaphore = asyncio.Semaphore(DETAIL_CONCURRENCY)
+
+    async def fetch_one(lot_id: Any) -> Dict[str, Any]:
+        # Карточки, загруженные за последние сутки, берем с диска (поисковую выдачу не кэшируем)
+        cached = torgi_detail_cache.get(lot_id)
+        if cached is not None:
+            return cached
+        async with semaphore:
+            logger.info(f"Получение деталей лота {lot_id}")
+            detail = await _fetch_json(LOT.format(lot_id))
+        torgi_detail_cache.set(lot_id, detail)
+        return detail
+
+    return await asyncio.gather(*(fetch_one(lot_id) for lot_id in lot_ids), return_exceptions=True)
+
 async def fetch_lots(max_pages: int = 10) -> List[Lot]:
     """
     Получает лоты с торгов с поддержкой пагинации.
@@ -127,108 +221,146 @@ async def fetch_lots(max_pages: int = 10) -> List[Lot]:
     Returns:
         List[Lot]: Список всех найденных лотов
     """
-    logger.info(f"Запуск получения лотов (максимум {max_pages} страниц)")
-    
-    lots: List[Lot] = []
-    current_page = 0
-    has_more_pages = True
-    total_pages = 0
-    
-    # Цикл по страницам
-    while has_more_pages and current_page < max_pages:
-        url = BASE.format(current_page)
-        logger.info(f"Запрос страницы {current_page+1}: {url}")
-        
+    global _session
+    previous_session, _session = _session, _open_session()
+    try:
+        async with _session:
+            return await _fetch_lots(max_pages)
+    finally:
+        _session = previous_session
+
+# Сколько страниц выдачи запрашивается одновременно
+PAGE_CONCURRENCY = 4
+
+# Категории торгов, которые берем в работу (в нижнем регистре, подстроки названия категории)
+VALID_TORGI_CATEGORIES = (
+    "нежилые помещения", "иной объект недвижимости",
+    "право размещения нестационарного объекта", "имущественные комплексы",
+    "единый недвижимый комплекс", "сооружения", "здания", "земельные участки",
+    "комплексное развитие территорий", "земли сельскохозяйственного назначения",
+    "земли населенных пунктов",
+)
+# Одна альтернатива вместо цикла по подстрокам
+_CATEGORY_RE = re.compile("|".join(re.escape(c) for c in VALID_TORGI_CATEGORIES))
+# Признаки парковок/машиномест в категории или названии лота
+PARKING_KEYWORDS = ("парковк", "паркинг", "машиноместо", "машино-место", "парковочное место")
+
+async def _collect_page(page_json: Dict[str, Any], page: int, lots: List[Lot]) -> None:
+    """Загружает карточки лотов страницы, фильтрует их и добавляет в lots."""
+    # Получение массива лотов на текущей странице
+    lot_items = page_json.get("content", [])
+    logger.info(f"Получено {len(lot_items)} лотов на странице {page+1}")
+
+    # Лоты, чья категория уже в выдаче не подходит, отсеиваем до загрузки карточек
+    lot_ids = []
+    for item in lot_items:
+        if not item.get("id"):
+            continue
+        category = (item.get("category") or {}).get("name")
+        if category and not _CATEGORY_RE.search(category.lower()):
+            logger.info(f"Пропуск лота {item['id']} категории '{category}' (не соответствует критериям)")
+            continue
+        lot_ids.append(item["id"])
+
+    # Детальная информация по оставшимся лотам загружается параллельно
+    details = await _fetch_details(lot_ids)
+
+    # Обработка каждого лота
+    for lot_id, detail in zip(lot_ids, details):
         try:
-            # Получаем JSON текущей страницы
-            page_json = await _fetch_json(url)
-            
-            # Проверка на пустую страницу
-            if page_json.get("empty", True):
-                logger.info(f"Страница {current_page+1} пуста, завершаем загрузку")
-                break
-            
-            # Получение информации о пагинации
-            has_more_pages = not page_json.get("last", True)
-            total_pages = page_json.get("totalPages", 0)
-            total_elements = page_json.get("totalElements", 0)
-            
-            logger.info(f"Информация о пагинации: текущая страница {current_page+1}/{total_pages}, "
-                         f"всего элементов: {total_elements}, есть еще страницы: {has_more_pages}")
-            
-            # Получение массива лотов на текущей странице
-            lot_items = page_json.get("content", [])
-            logger.info(f"Получено {len(lot_items)} лотов на странице {current_page+1}")
-            
-            # Обработка каждого лота
-            for item in lot_items:
-                try:
-                    lot_id = item.get("id")
-                    if not lot_id:
-                        continue
-                    
-                    # Получаем детальную информацию о лоте
-                    detail_url = LOT.format(lot_id)
-                    logger.info(f"Получение деталей лота {lot_id}")
-                    
-                    detail = await _fetch_json(detail_url)
-                    if not detail:
-                        logger.warning(f"Нет данных для лота {lot_id}")
-                        continue
-                    valid_torgi_categories = [
-                        "нежилые помещения", "иной объект недвижимости", 
-                        "право размещения нестационарного объекта", "имущественные комплексы",
-                        "единый недвижимый комплекс", "сооружения", "здания", "земельные участки",
-                        "комплексное развитие территорий", "земли сельскохозяйственного назначения",
-                        "земли населенных пунктов", "земельные участки"
-                    ]
-                    chars = detail.get("characteristics", [])
-                    area = float(_char(chars, "totalAreaRealty", 0))
-        
-                    # ФИЛЬТР 1: Проверка минимальной площади (60 кв.м)
-                    if area < 60:
-                        logger.info(f"Пропуск лота {lot_id} с площадью {area}м² (меньше 60м²)")
-                        continue
-                    # После получения данных о лоте, но перед добавлением в список
-                    property_category = detail.get("category", {}).get("name", "").lower()
-                    if not any(category.lower() in property_category for category in valid_torgi_categories):
-                        logger.info(f"Пропуск лота категории '{property_category}' (не соответствует критериям)")
-                        continue
-                    parking_keywords = ["парковк", "паркинг", "машиноместо", "машино-место", "парковочное место"]
-                    if any(keyword in property_category.lower() or 
-                        keyword in detail.get("lotName", "").lower() for keyword in parking_keywords):
-                        logger.info(f"Пропуск лота {lot_id}: обнаружены ключевые слова парковки/машиноместа")
-                        continue
-
-                    cadastral_number = _char(chars, "cadastralNumberRealty", "")
-                    if cadastral_number and not (cadastral_number.startswith('50:') or cadastral_number.startswith('77:')):
-                        logger.info(f"Пропуск лота {lot_id}: кадастровый номер {cadastral_number} не относится к Москве/МО")
-                        continue
-                    # Преобразуем JSON в объект Lot
-                    lot = _to_lot(detail)
-                    lots.append(lot)
-                    logger.info(f"Добавлен лот {lot.id}: {lot.name[:30]}...")
-                    
-                except Exception as e:
-                    logger.error(f"Ошибка при обработке лота: {e}")
-                    continue
-            
-            # Переход к следующей странице
-            current_page += 1
+            if isinstance(detail, BaseException):
+                raise detail
+            if not detail:
+                logger.warning(f"Нет данных для лота {lot_id}")
+                continue
+            cmap = _char_map(detail.get("characteristics", []))
+            area = _num(cmap.get("totalAreaRealty"))
+
+            # ФИЛЬТР 1: Проверка минимальной площади (60 кв.м)
+            if area < 60:
+                logger.info(f"Пропуск лота {lot_id} с площадью {area}м² (меньше 60м²)")
+                continue
+            # После получения данных о лоте, но перед добавлением в список
+            property_category = detail.get("category", {}).get("name", "").lower()
+            if not _CATEGORY_RE.search(property_category):
+                logger.info(f"Пропуск лота категории '{property_category}' (не соответствует критериям)")
+                continue
+            lot_name = detail.get("lotName", "").lower()
+            if any(keyword in property_category or keyword in lot_name for keyword in PARKING_KEYWORDS):
+                logger.info(f"Пропуск лота {lot_id}: обнаружены ключевые слова парковки/машиноместа")
+                continue
+
+            cadastral_number = cmap.get("cadastralNumberRealty", "")
+            if cadastral_number and not (cadastral_number.startswith('50:') or cadastral_number.startswith('77:')):
+                logger.info(f"Пропуск лота {lot_id}: кадастровый номер {cadastral_number} не относится к Москве/МО")
+                continue
+            # Преобразуем JSON в объект Lot
+            lot = _to_lot(detail)
+            lots.append(lot)
+            logger.info(f"Добавлен лот {lot.id}: {lot.name[:30]}...")
             
-            # Пауза между запросами, чтобы не нагружать сервер
-            if has_more_pages and current_page < max_pages:
-                pause_time = random.uniform(1.5, 3.0)
-                logger.info(f"Пауза {pause_time:.2f} секунд перед следующей страницей")
-                await asyncio.sleep(pause_time)
-        
         except Exception as e:
-            logger.error(f"Ошибка при загрузке страницы {current_page+1}: {e}")
-            # Делаем паузу перед повторной попыткой или переходом к следующей странице
-            await asyncio.sleep(5)
-            
-            # Увеличиваем счетчик, чтобы избежать зацикливания на проблемной странице
-            current_page += 1
+            logger.error(f"Ошибка при обработке лота {lot_id}: {e}")
+            continue
+
+async def _fetch_lots(max_pages: int) -> List[Lot]:
+    """Загрузка страниц и карточек лотов через общую сессию."""
+    logger.info(f"Запуск получения лотов (максимум {max_pages} страниц)")
+    
+    lots: List[Lot] = []
+    if max_pages < 1:
+        return lots
+
+    # Первая страница нужна, чтобы узнать общее количество страниц
+    url = BASE.format(0)
+    logger.info(f"Запрос страницы 1: {url}")
+    try:
+        first_page = await _fetch_json(url)
+    except Exception as e:
+        logger.error(f"Ошибка при загрузке страницы 1: {e}")
+        return lots
+
+    # Проверка на пустую страницу
+    if first_page.get("empty", True):
+        logger.info("Страница 1 пуста, завершаем загрузку")
+        return lots
+
+    # Получение информации о пагинации
+    total_pages = first_page.get("totalPages", 0)
+    total_elements = first_page.get("totalElements", 0)
+    pages_total = 1 if first_page.get("last", True) else min(max_pages, total_pages)
+    logger.info(f"Информация о пагинации: всего страниц {total_pages}, "
+                f"всего элементов: {total_elements}, будет загружено страниц: {pages_total}")
+
+    # Остальные страницы запрашиваются параллельно (без пауз: нагрузку на сервер
+    # ограничивают семафор и limit_per_host коннектора), пока обрабатывается первая
+    semaphore = asyncio.Semaphore(PAGE_CONCURRENCY)
+
+    async def fetch_page(page: int) -> Dict[str, Any]:
+        async with semaphore:
+            logger.info(f"Запрос страницы {page+1}")
+            return await _fetch_json(BASE.format(page))
+
+    rest_pages = asyncio.ensure_future(asyncio.gather(
+        *(fetch_page(page) for page in range(1, pages_total)), return_exceptions=True
+    ))
+    try:
+        await _collect_page(first_page, 0, lots)
+        pages = await rest_pages
+    finally:
+        if not rest_pages.done():
+            rest_pages.cancel()
+
+    loaded_pages = 1
+    for page, page_json in enumerate(pages, start=1):
+        if isinstance(page_json, BaseException):
+            logger.error(f"Ошибка при загрузке страницы {page+1}: {page_json}")
+            continue
+        if page_json.get("empty", True):
+            logger.info(f"Страница {page+1} пуста, завершаем загрузку")
+            break
+        await _collect_page(page_json, page, lots)
+        loaded_pages += 1
     
-    logger.info(f"Всего загружено {len(lots)} лотов со {current_page} страниц (из {total_pages} доступных)")
-    return lots
\ No newline at end of file
+    logger.info(f"Всего загружено {len(lots)} лотов со {loaded_pages} страниц (из {total_pages} доступных)")
+    return lots
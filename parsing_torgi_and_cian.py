@@ -1,10 +1,12 @@
 import itertools
 import os
 import signal
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
-from functools import cached_property
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Callable
 from uuid import uuid4, UUID
@@ -18,14 +20,17 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 
 # noinspection PyProtectedMember
 from googleapiclient.discovery import build, Resource
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+from googleapiclient.model import JsonModel
 
 from dateutil import tz
 import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from selenium.common import NoSuchElementException
-from selenium.webdriver.common.by import By
 from tqdm import tqdm
-from bs4 import BeautifulSoup
+from lxml import html as lxml_html
 from undetected_chromedriver import ChromeOptions, Chrome
 
 REPEAT_DELAY_HOURS = 0  # 0 means no repeat
@@ -35,6 +40,11 @@ GOOGLE_SPREADSHEET_ID = "1wir2oXE8XG4K3krRsw95OIJAnvFUeAZQRKuPy9BWKOM"
 
 CHROME_EXECUTABLE_PATH = Path.home() / ".local/share/chrome-linux64/chrome"
 
+CACHE_DIR = Path(".cache")
+LOOKUP_CACHE_TTL_SECONDS = 24 * 60 * 60
+OFFER_CACHE_PATH = CACHE_DIR / "cian_offers.jsonl"
+OFFER_CACHE_TTL_SECONDS = 24 * 60 * 60
+
 GOOGLE_CREDENTIALS_PATH = Path("google-auth/credentials-spreadsheets.json")
 GOOGLE_TOKEN_PATH = Path("google-auth/token-spreadsheets.json")
 
@@ -42,8 +52,26 @@ MOSCOW_TZ = tz.gettz("Europe/Moscow")
 DATETIME_FORMAT_STRING = "%d.%m.%Y %H:%M:%S"
 TIME_FORMAT_STRING = "%H:%M:%S"
 FALLBACK_DATETIME = datetime(year=1970, month=1, day=1)
+FALLBACK_DATETIME_ISO = FALLBACK_DATETIME.isoformat()
+
+CIAN_FILTER_WORKERS = 10  # concurrent address -> search filter lookups
+TORGI_LOT_WORKERS = 10  # concurrent lot card requests within a search page
+CIAN_OFFER_WORKERS = 4  # concurrent offer page requests within a search
+CIAN_JSON_TIMEOUT = 15
+
+DRIVER_ATTEMPTS = 10
+DRIVER_RETRY_DELAY_SECONDS = 1
+
+OFFER_CONFIG_MARKER = "window._cianConfig['frontend-offer-card']"
+
+UPLOAD_ATTEMPTS = 5
+UPLOAD_RETRY_STATUSES = (429, 500, 502, 503, 504)
 
 NO_DATA_MESSAGE = "нет данных"
+LAND_AREA_UNIT_TO_M2 = {
+    "sotka": 100.0,
+    "hectare": 10000.0,
+}
 IGNORE_PROPERTY_CATEGORIES = [
     "Гаражи и машиноместа",
     "Машиноместо",
@@ -52,14 +80,66 @@ IGNORE_PROPERTY_CATEGORIES = [
 driver: Chrome
 service: Resource
 refresh_main_page: Callable[[], None]
+cian_session: requests.Session | None = None  # carries the browser's cookies for JSON endpoints
+driver_lock = threading.RLock()  # the browser is shared between filter lookup threads
 
-federal_law_hints = {
-    hint["code"]: hint["fullName"]
-    for hint in requests.get(
-        "https://torgi.gov.ru/new/nsi/v1/RELATIONSHIP_BIDD_HINTEXT"
-    ).json()
-}
+# keep-alive connections to torgi.gov.ru, shared by the page and lot card requests
+torgi_session = requests.Session()
+torgi_session.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=20))
+
+
+def cached_json(path: Path, ttl_seconds: int, fetch: Callable[[], ...]) -> ...:
+    # rarely changing lookup tables are kept on disk instead of refetched on every start
+    if path.exists() and time.time() - path.stat().st_mtime < ttl_seconds:
+        return orjson.loads(path.read_bytes())
+
+    result = fetch()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(orjson.dumps(result))
+    return result
+
+
+FEDERAL_LAW_HINTS_CACHE_PATH = CACHE_DIR / "federal_law_hints.json"
+
+
+def fetch_federal_law_hints() -> dict[str, str]:
+    return {
+        hint["code"]: hint["fullName"]
+        for hint in torgi_session.get(
+            "https://torgi.gov.ru/new/nsi/v1/RELATIONSHIP_BIDD_HINTEXT"
+        ).json()
+    }
+
+
+federal_law_hints: dict[str, str] = cached_json(
+    FEDERAL_LAW_HINTS_CACHE_PATH,
+    LOOKUP_CACHE_TTL_SECONDS,
+    fetch_federal_law_hints,
+)
+federal_law_hints_refreshed = False
+
+
+def federal_law_hint(code: str) -> str:
+    global federal_law_hints, federal_law_hints_refreshed
+
+    # a code missing from the cached table may have appeared on torgi.gov.ru
+    # after the cache was written, so the table is refetched once per run
+    if code not in federal_law_hints and not federal_law_hints_refreshed:
+        federal_law_hints_refreshed = True
+        FEDERAL_LAW_HINTS_CACHE_PATH.unlink(missing_ok=True)
+        federal_law_hints = cached_json(
+            FEDERAL_LAW_HINTS_CACHE_PATH,
+            LOOKUP_CACHE_TTL_SECONDS,
+            fetch_federal_law_hints,
+        )
+
+    if code not in federal_law_hints:
+        info(f"Unknown npaHintCode {code!r}, leaving law reference empty")
+        return ""
+
+    return federal_law_hints[code]
 moscow_district_name_to_cian_id: dict[str, int] | None = None
+known_offers: dict[str, tuple[str, float, float]] = {}  # offer url -> (address, area, price)
 
 address_replacements = {
     "р-н": "район",
@@ -195,6 +275,37 @@ class CianRentOffer:
     lot_uuid: UUID
 
 
+class RateLimiter:
+    # token bucket shared between threads: at most `rate` requests per second on average
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                delay = (1 - self._tokens) / self.rate
+
+            time.sleep(delay)
+
+
+torgi_limiter = RateLimiter(5, burst=5)
+cian_limiter = RateLimiter(3, burst=3)
+
+
 def info(message: str) -> None:
     current_moment = datetime.now()
     tqdm.write(f"{current_moment.strftime(TIME_FORMAT_STRING)} INFO: {message}")
@@ -210,78 +321,171 @@ def info_followup(message: str) -> None:
 
 
 def driver_get_page(url: str) -> str:
-    try:
-        driver.get(url)
-        return driver.page_source
-    except Exception:
-        driver_setup()
-        return driver_get_page(url)
+    for _ in range(DRIVER_ATTEMPTS):
+        try:
+            cian_limiter.acquire()
+            driver.get(url)
+            return driver.page_source
+        except Exception:
+            driver_setup()
 
+    raise RuntimeError(f"failed to load page after {DRIVER_ATTEMPTS} attempts: {url}")
 
-def driver_get_json(url: str, _retries: int = 0) -> ...:
-    try:
-        driver.get(url)
-    except Exception:
-        driver_setup()
-        return driver_get_json(url)
 
-    if _retries > 0:
-        time.sleep(3)
+def cian_session_setup() -> None:
+    global cian_session
 
-    try:
-        return orjson.loads(driver.find_element(By.TAG_NAME, "pre").text)
-    except NoSuchElementException:
-        if _retries < 10:
-            time.sleep(1)
-            return driver_get_json(url, _retries + 1)
+    session = requests.Session()
+    session.headers.update(
+        {
+            "User-Agent": driver.execute_script("return navigator.userAgent"),
+            "Referer": URLs.CIAN_MAIN_URL,
+            "Accept": "application/json",
+        }
+    )
+    for cookie in driver.get_cookies():
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain"),
+            path=cookie.get("path", "/"),
+        )
+
+    cian_session = session
 
-        raise
 
+def session_request_json(method: str, url: str, body: dict[str, ...] | None = None) -> ...:
+    # None means "ask the browser": CIAN answered with an error or an anti-bot page
+    if cian_session is None:
+        return None
 
-def driver_post(url: str, body: dict[str, ...], _retries: int = 0) -> ...:
     try:
-        driver.execute_script(
-            """
-            function post(path, params, method='post') {
-                const form = document.createElement('form');
-                form.method = method;
-                form.action = path;
-
-                for (const key in params) {
-                    if (params.hasOwnProperty(key)) {
-                        const hiddenField = document.createElement('input');
-                        hiddenField.type = 'hidden';
-                        hiddenField.name = key;
-                        hiddenField.value = params[key];
-
-                        form.appendChild(hiddenField);
-                    }
-                }
+        cian_limiter.acquire()
+        response = cian_session.request(method, url, data=body, timeout=CIAN_JSON_TIMEOUT)
+        if response.ok:
+            return orjson.loads(response.content)
+    except (requests.RequestException, orjson.JSONDecodeError):
+        pass
 
-                document.body.appendChild(form);
-                form.submit();
-            }
+    return None
 
-            post(arguments[1], arguments[0]);
-            """,
-            body,
-            url,
-        )
-    except Exception:
-        driver_setup()
-        driver_post(url, body)
 
-    if _retries > 0:
-        time.sleep(3)
+def session_get_page(url: str) -> str | None:
+    if cian_session is None:
+        return None
 
     try:
-        return orjson.loads(driver.find_element(By.TAG_NAME, "pre").text)
-    except NoSuchElementException:
-        if _retries < 10:
-            time.sleep(1)
-            return driver_get_json(url, _retries + 1)
+        cian_limiter.acquire()
+        response = cian_session.get(
+            url, headers={"Accept": "text/html"}, timeout=CIAN_JSON_TIMEOUT
+        )
+        if response.ok:
+            return response.text
+    except requests.RequestException:
+        pass
+
+    return None
+
+
+def get_offer_page(url: str) -> str:
+    # offer pages are tried over HTTP first; the browser is used when CIAN
+    # serves something without the card config (anti-bot page, error)
+    offer_page = session_get_page(url)
+    if offer_page is not None and OFFER_CONFIG_MARKER in offer_page:
+        return offer_page
+
+    with driver_lock:
+        return driver_get_page(url)
+
+
+def driver_get_json(url: str) -> ...:
+    json_data = session_request_json("GET", url)
+    if json_data is not None:
+        return json_data
+
+    with driver_lock:
+        return browser_get_json(url)
+
+
+def driver_post(url: str, body: dict[str, ...]) -> ...:
+    json_data = session_request_json("POST", url, body)
+    if json_data is not None:
+        return json_data
+
+    with driver_lock:
+        return browser_post(url, body)
+
+
+def browser_json_text() -> str:
+    # one script call instead of find_element + .text (two WebDriver round trips
+    # and a rendered-text computation); textContent of <pre> is the raw JSON
+    text = driver.execute_script(
+        "const pre = document.querySelector('pre'); return pre && pre.textContent;"
+    )
+    if text is None:
+        raise NoSuchElementException("no <pre> with JSON on the page")
+
+    return text
+
+
+def browser_get_json(url: str) -> ...:
+    for _ in range(DRIVER_ATTEMPTS):
+        try:
+            cian_limiter.acquire()
+            driver.get(url)
+        except Exception:
+            driver_setup()
+            continue
+
+        try:
+            return orjson.loads(browser_json_text())
+        except NoSuchElementException:
+            time.sleep(DRIVER_RETRY_DELAY_SECONDS)
+
+    raise RuntimeError(f"failed to get json after {DRIVER_ATTEMPTS} attempts: {url}")
+
 
-        raise
+def browser_post(url: str, body: dict[str, ...]) -> ...:
+    for _ in range(DRIVER_ATTEMPTS):
+        try:
+            cian_limiter.acquire()
+            driver.execute_script(
+                """
+                function post(path, params, method='post') {
+                    const form = document.createElement('form');
+                    form.method = method;
+                    form.action = path;
+
+                    for (const key in params) {
+                        if (params.hasOwnProperty(key)) {
+                            const hiddenField = document.createElement('input');
+                            hiddenField.type = 'hidden';
+                            hiddenField.name = key;
+                            hiddenField.value = params[key];
+
+                            form.appendChild(hiddenField);
+                        }
+                    }
+
+                    document.body.appendChild(form);
+                    form.submit();
+                }
+
+                post(arguments[1], arguments[0]);
+                """,
+                body,
+                url,
+            )
+        except Exception:
+            driver_setup()
+            continue
+
+        try:
+            return orjson.loads(browser_json_text())
+        except NoSuchElementException:
+            time.sleep(DRIVER_RETRY_DELAY_SECONDS)
+
+    raise RuntimeError(f"failed to post after {DRIVER_ATTEMPTS} attempts: {url}")
 
 
 def get_lot_table_row(
@@ -293,21 +497,24 @@ def get_lot_table_row(
     if not price_history.startswith(current_history_record):
         price_history = f"{current_history_record}\n{price_history}"
 
+    # formulas repeat the row number many times, so it is converted to str once
+    row = str(row_num)
+
     return [
         row_num - 1,  # always 1 less than row_num because of the title row
         lot.name,
         lot.address,
         lot.custom_category,
         lot.area,
-        f"=I{row_num}/E{row_num}",
-        f'=IFERROR(J{row_num}/E{row_num}; "{NO_DATA_MESSAGE}")',
+        f"=I{row}/E{row}",
+        f'=IFERROR(J{row}/E{row}; "{NO_DATA_MESSAGE}")',
         price_history,
         lot.price,
-        f'=IFERROR(MEDIAN(ARRAYFORMULA(IF(cian_sale!G:G=AK{row_num}; cian_sale!E:E))); "{NO_DATA_MESSAGE}")',
-        f'=IFERROR(J{row_num}-I{row_num}; "{NO_DATA_MESSAGE}")',
-        f'=IFERROR((J{row_num}/I{row_num})-100%; "{NO_DATA_MESSAGE}")',
-        f'=IFERROR(MEDIAN(ARRAYFORMULA(IF(cian_rent!G:G=AK{row_num}; cian_rent!E:E))); "{NO_DATA_MESSAGE}")',
-        f'=IFERROR(M{row_num}/J{row_num}; "{NO_DATA_MESSAGE}")',
+        f'=IFERROR(MEDIAN(ARRAYFORMULA(IF(cian_sale!G:G=AK{row}; cian_sale!E:E))); "{NO_DATA_MESSAGE}")',
+        f'=IFERROR(J{row}-I{row}; "{NO_DATA_MESSAGE}")',
+        f'=IFERROR((J{row}/I{row})-100%; "{NO_DATA_MESSAGE}")',
+        f'=IFERROR(MEDIAN(ARRAYFORMULA(IF(cian_rent!G:G=AK{row}; cian_rent!E:E))); "{NO_DATA_MESSAGE}")',
+        f'=IFERROR(M{row}/J{row}; "{NO_DATA_MESSAGE}")',
         lot.url,
         lot.notice_number,
         lot.lot_number,
@@ -348,206 +555,182 @@ def get_offer_table_row(
     ]
 
 
+def execute_with_retry(request: HttpRequest) -> dict:
+    # each Sheets call is retried on its own: re-running the whole upload
+    # after a failure would append the rows of the calls that already succeeded again
+    for attempt in range(UPLOAD_ATTEMPTS):
+        try:
+            return request.execute()
+        except (HttpError, OSError) as error:
+            retryable = not isinstance(error, HttpError) or error.resp.status in UPLOAD_RETRY_STATUSES
+            if not retryable or attempt == UPLOAD_ATTEMPTS - 1:
+                raise
+
+            delay = 2**attempt
+            info(f"Sheets request failed ({error}), retrying in {delay}s...")
+            time.sleep(delay)
+
+
+def append_rows(sheet_name: str, rows: list[list]) -> None:
+    execute_with_retry(
+        service.spreadsheets()
+        .values()
+        .append(
+            spreadsheetId=GOOGLE_SPREADSHEET_ID,
+            range=sheet_name,
+            valueInputOption="USER_ENTERED",
+            body={"values": rows},
+        )
+    )
+
+
 def upload(
     *,
     lots: list[TorgiLot] | None = None,
     sale_offers: list[CianSaleOffer] | None = None,
     rent_offers: list[CianRentOffer] | None = None,
 ) -> None:
-    try:
+    offer_sheets = [
+        (offer_list, sheet_name)
         for offer_list, sheet_name in [
             (sale_offers, "cian_sale"),
             (rent_offers, "cian_rent"),
-        ]:
-            if not offer_list:
-                continue
-
-            cian_num_column = (
-                service.spreadsheets()
-                .values()
-                .get(
-                    spreadsheetId=GOOGLE_SPREADSHEET_ID,
-                    range=f"{sheet_name}!A:A",
-                    majorDimension="COLUMNS",
-                )
-                .execute()
-            )
-            try:
-                cian_last_row_num = int(
-                    cian_num_column.get("values", [["title", 0]])[0][-1]
-                )
-            except ValueError:
-                cian_last_row_num = 0
-
-            # cian_url_column = (
-            #     service.spreadsheets()
-            #     .values()
-            #     .get(
-            #         spreadsheetId=GOOGLE_SPREADSHEET_ID,
-            #         range=f"{sheet_name}!F:F",
-            #         majorDimension="COLUMNS",
-            #     )
-            #     .execute()
-            # )
-            # present_offer_url_to_row_num = dict(
-            #     zip(
-            #         cian_url_column.get("values", [[]])[0][1:],
-            #         itertools.count(2),
-            #     )
-            # )
-
-            new_offers = [
-                offer
-                for offer in offer_list
-                # if offer.url not in present_offer_url_to_row_num
-            ]
-            # present_offers_to_row_num = {
-            #     offer: present_offer_url_to_row_num[offer.url]
-            #     for offer in offer_list
-            #     if offer.url in present_offer_url_to_row_num
-            # }
+        ]
+        if offer_list
+    ]
 
-            (
-                service.spreadsheets()
-                .values()
-                .append(
-                    spreadsheetId=GOOGLE_SPREADSHEET_ID,
-                    range=sheet_name,
-                    valueInputOption="USER_ENTERED",
-                    body={
-                        "values": [
-                            get_offer_table_row(offer, row_num)
-                            for row_num, offer in enumerate(
-                                new_offers, start=cian_last_row_num + 2
-                            )
-                            # 2 = {+1 offset due to title} + {+1 because it is the next}
-                        ]
-                    },
-                )
-                .execute()
-            )
+    ranges = [f"{sheet_name}!A:A" for _, sheet_name in offer_sheets]
+    if lots:
+        ranges += ["torgi!A:A", "torgi!O:O", "torgi!H:H"]
+    if not ranges:
+        return
 
-            # (
-            #     service.spreadsheets()
-            #     .values()
-            #     .batchUpdate(
-            #         spreadsheetId=GOOGLE_SPREADSHEET_ID,
-            #         body={
-            #             "valueInputOption": "USER_ENTERED",
-            #             "data": [
-            #                 {
-            #                     "range": f"{sheet_name}!{row_num}:{row_num}",
-            #                     "values": [get_offer_table_row(offer, row_num)],
-            #                 }
-            #                 for offer, row_num in present_offers_to_row_num.items()
-            #             ],
-            #         },
-            #     )
-            # )
-
-        if not lots:
-            return
-
-        torgi_num_column = (
+    # every column needed below is read in a single round trip
+    value_ranges = iter(
+        execute_with_retry(
             service.spreadsheets()
             .values()
-            .get(
+            .batchGet(
                 spreadsheetId=GOOGLE_SPREADSHEET_ID,
-                range="torgi!A:A",
+                ranges=ranges,
                 majorDimension="COLUMNS",
             )
-            .execute()
+        )["valueRanges"]
+    )
+
+    # new rows are appended (the sheet picks where they go and grows as needed),
+    # rows already present in torgi are rewritten in a single batchUpdate
+    update_data = []
+
+    for offer_list, sheet_name in offer_sheets:
+        cian_num_column = next(value_ranges)
+        try:
+            cian_last_row_num = int(
+                cian_num_column.get("values", [["title", 0]])[0][-1]
+            )
+        except ValueError:
+            cian_last_row_num = 0
+
+        # cian_url_column = next(value_ranges)  # needs f"{sheet_name}!F:F" in ranges
+        # present_offer_url_to_row_num = dict(
+        #     zip(
+        #         cian_url_column.get("values", [[]])[0][1:],
+        #         itertools.count(2),
+        #     )
+        # )
+
+        new_offers = [
+            offer
+            for offer in offer_list
+            # if offer.url not in present_offer_url_to_row_num
+        ]
+        # present_offers_to_row_num = {
+        #     offer: present_offer_url_to_row_num[offer.url]
+        #     for offer in offer_list
+        #     if offer.url in present_offer_url_to_row_num
+        # }
+
+        append_rows(
+            sheet_name,
+            [
+                get_offer_table_row(offer, row_num)
+                for row_num, offer in enumerate(new_offers, start=cian_last_row_num + 2)
+                # 2 = {+1 offset due to title} + {+1 because it is the next}
+            ],
         )
+
+        # update_data += [
+        #     {
+        #         "range": f"{sheet_name}!{row_num}:{row_num}",
+        #         "values": [get_offer_table_row(offer, row_num)],
+        #     }
+        #     for offer, row_num in present_offers_to_row_num.items()
+        # ]
+
+    if lots:
+        torgi_num_column = next(value_ranges)
         try:
             torgi_last_row_num = int(torgi_num_column.get("values", [["title", 0]])[0][-1])
         except ValueError:
             torgi_last_row_num = 0
 
-        torgi_url_column = (
-            service.spreadsheets()
-            .values()
-            .get(
-                spreadsheetId=GOOGLE_SPREADSHEET_ID,
-                range="torgi!O:O",
-                majorDimension="COLUMNS",
-            )
-            .execute()
-        )
-        present_lot_url_to_row_num: dict[str, int] = dict(
-            zip(
-                torgi_url_column.get("values", [[]])[0][1:],
-                itertools.count(2),
-            )
-        )
-        torgi_price_history_column = (
-            service.spreadsheets()
-            .values()
-            .get(
-                spreadsheetId=GOOGLE_SPREADSHEET_ID,
-                range="torgi!H:H",
-                majorDimension="COLUMNS",
-            )
-            .execute()
-        )
-        present_lot_url_to_price_history: dict[str, str] = dict(
-            zip(
-                torgi_url_column.get("values", [[]])[0][1:],
-                torgi_price_history_column.get("values", [[]])[0][1:],
-            )
-        )
-
-        new_lots = [lot for lot in lots if lot.url not in present_lot_url_to_row_num]
-        present_lots_to_row_num_and_price_history = {
-            lot: (
-                present_lot_url_to_row_num[lot.url],
-                present_lot_url_to_price_history[lot.url],
+        torgi_urls = next(value_ranges).get("values", [[]])[0][1:]
+        torgi_price_histories = next(value_ranges).get("values", [[]])[0][1:]
+        # one pass over the columns; the sheet trims trailing empty cells,
+        # so a shorter price history column is padded with ""
+        present_lot_url_to_row_num_and_price_history: dict[str, tuple[int, str]] = {
+            url: (row_num, price_history)
+            for row_num, (url, price_history) in enumerate(
+                itertools.zip_longest(
+                    torgi_urls, torgi_price_histories[: len(torgi_urls)], fillvalue=""
+                ),
+                start=2,
             )
-            for lot in lots
-            if lot.url in present_lot_url_to_row_num
         }
 
-        (
-            service.spreadsheets()
-            .values()
-            .append(
-                spreadsheetId=GOOGLE_SPREADSHEET_ID,
-                range="torgi",
-                valueInputOption="USER_ENTERED",
-                body={
-                    "values": [
-                        get_lot_table_row(lot, row_num)
-                        for row_num, lot in enumerate(
-                            new_lots, start=torgi_last_row_num + 2
-                        )
-                        # 2 = {+1 offset due to title} + {+1 because it is the next}
-                    ]
-                },
+        # one lookup per lot splits them into new and already present ones
+        new_lots: list[TorgiLot] = []
+        present_lots_to_row_num_and_price_history: dict[TorgiLot, tuple[int, str]] = {}
+        for lot in lots:
+            row_num_and_price_history = present_lot_url_to_row_num_and_price_history.get(lot.url)
+            if row_num_and_price_history is None:
+                new_lots.append(lot)
+            else:
+                present_lots_to_row_num_and_price_history[lot] = row_num_and_price_history
+
+        if new_lots:
+            append_rows(
+                "torgi",
+                [
+                    get_lot_table_row(lot, row_num)
+                    for row_num, lot in enumerate(new_lots, start=torgi_last_row_num + 2)
+                    # 2 = {+1 offset due to title} + {+1 because it is the next}
+                ],
             )
-            .execute()
-        )
 
-        (
+        update_data += [
+            {
+                "range": f"torgi!{row_num}:{row_num}",
+                "values": [get_lot_table_row(lot, row_num, price_history)],
+            }
+            for lot, (
+                row_num,
+                price_history,
+            ) in present_lots_to_row_num_and_price_history.items()
+        ]
+
+    if update_data:
+        execute_with_retry(
             service.spreadsheets()
             .values()
             .batchUpdate(
                 spreadsheetId=GOOGLE_SPREADSHEET_ID,
                 body={
                     "valueInputOption": "USER_ENTERED",
-                    "data": [
-                        {
-                            "range": f"torgi!{row_num}:{row_num}",
-                            "values": [get_lot_table_row(lot, row_num, price_history)],
-                        }
-                        for lot, (
-                            row_num,
-                            price_history,
-                        ) in present_lots_to_row_num_and_price_history.items()
-                    ],
+                    "data": update_data,
                 },
             )
         )
-    except Exception:
-        upload(lots=lots, rent_offers=rent_offers, sale_offers=sale_offers)
 
 
 def unformatted_address_to_cian_search_filter(address: str) -> str:
@@ -611,16 +794,30 @@ def unformatted_address_to_cian_search_filter(address: str) -> str:
         return "region=4593" if "Московская область" in address else "region=1"
 
 
-def extract_lot_characteristic(
-    lot_info: dict[str, ...], characteristic_code: str, default: ...
-) -> str:
-    return next(
-        filter(
-            lambda characteristic: characteristic["code"] == characteristic_code,
-            lot_info["characteristics"],
-        ),
-        {"characteristicValue": default},
-    )["characteristicValue"]
+def lot_characteristics(lot_info: dict[str, ...]) -> dict[str, ...]:
+    # code -> value in one pass; reversed so that the first occurrence of a code wins.
+    # Entries without a code or a value are skipped, so callers fall back to their defaults
+    return {
+        characteristic["code"]: characteristic.get("characteristicValue")
+        for characteristic in reversed(lot_info["characteristics"])
+        if "code" in characteristic and characteristic.get("characteristicValue") is not None
+    }
+
+
+@lru_cache(maxsize=4096)
+def to_moscow(iso_datetime: str) -> datetime:
+    # lots of one notice share their dates, so each distinct string is parsed once
+    return datetime.fromisoformat(iso_datetime).astimezone(MOSCOW_TZ)
+
+
+def get_torgi_lot_info(lot_id: str) -> dict[str, ...]:
+    torgi_limiter.acquire()
+    return torgi_session.get(URLs.TORGI_LOT_API.format(lot_id)).json()
+
+
+def get_torgi_search_page(page: int) -> dict[str, ...]:
+    torgi_limiter.acquire()
+    return torgi_session.get(URLs.TORGI_SEARCH_API.format(page)).json()
 
 
 def parse_torgi() -> list[TorgiLot]:
@@ -629,68 +826,75 @@ def parse_torgi() -> list[TorgiLot]:
     try:
         lots: list[TorgiLot] = []
 
-        for page in itertools.count():
-            search_response = requests.get(URLs.TORGI_SEARCH_API.format(page))
-            search_response_json: dict[str, ...] = search_response.json()
+        with ThreadPoolExecutor(max_workers=1) as page_executor:
+            next_page_future = page_executor.submit(get_torgi_search_page, 0)
 
-            if search_response_json["empty"]:
-                break
+            for page in itertools.count():
+                search_response_json: dict[str, ...] = next_page_future.result()
 
-            bar.total = search_response_json["totalPages"]
+                if search_response_json["empty"]:
+                    break
 
-            for lot_search_result in tqdm(
-                search_response_json["content"], desc="lots on page", leave=False
-            ):
-                lot_id = lot_search_result["id"]
+                bar.total = search_response_json["totalPages"]
 
-                lot_response = requests.get(URLs.TORGI_LOT_API.format(lot_id))
-                lot_info: dict[str, ...] = lot_response.json()
+                # the next search page downloads while lot cards of this one are fetched
+                next_page_future = page_executor.submit(get_torgi_search_page, page + 1)
 
-                if lot_info["category"]["name"] in IGNORE_PROPERTY_CATEGORIES:
-                    continue
+                # lot cards of a page are requested concurrently, results keep page order
+                lot_ids = [
+                    lot_search_result["id"]
+                    for lot_search_result in search_response_json["content"]
+                ]
+                with ThreadPoolExecutor(max_workers=TORGI_LOT_WORKERS) as executor:
+                    lot_infos: list[dict[str, ...]] = list(
+                        tqdm(
+                            executor.map(get_torgi_lot_info, lot_ids),
+                            total=len(lot_ids),
+                            desc="lots on page",
+                            leave=False,
+                        )
+                    )
 
-                lots.append(
-                    TorgiLot(
-                        name=lot_info["lotName"],
-                        address=lot_info["estateAddress"],
-                        area=float(
-                            extract_lot_characteristic(lot_info, "totalAreaRealty", 0)
-                        ),
-                        price=lot_info["priceMin"],
-                        url=URLs.TORGI_LOG_PAGE.format(lot_id),
-                        notice_number=lot_info["noticeNumber"],
-                        lot_number=lot_info["lotNumber"],
-                        auction_type=lot_info["biddForm"]["name"],
-                        sale_type=lot_info["biddType"]["name"],
-                        law_reference=federal_law_hints[lot_info["npaHintCode"]],
-                        application_start=datetime.fromisoformat(
-                            lot_info["biddStartTime"]
-                        ).astimezone(MOSCOW_TZ),
-                        application_end=datetime.fromisoformat(
-                            lot_info["biddEndTime"]
-                        ).astimezone(MOSCOW_TZ),
-                        auction_start=datetime.fromisoformat(
-                            lot_info.get("auctionStartDate", FALLBACK_DATETIME.isoformat())
-                        ).astimezone(MOSCOW_TZ),
-                        cadastral_number=extract_lot_characteristic(
-                            lot_info, "cadastralNumberRealty", ""
-                        ),
-                        property_category=lot_info["category"]["name"],
-                        ownership_type=lot_info["ownershipForm"]["name"],
-                        auction_step=lot_info.get("priceStep", 0),
-                        deposit=lot_info.get("deposit", 0),
-                        recipient=lot_info["depositRecipientName"],
-                        recipient_inn=lot_info["depositRecipientINN"],
-                        recipient_kpp=lot_info["depositRecipientKPP"],
-                        bank_name=lot_info["depositBankName"],
-                        bank_bic=lot_info["depositBIK"],
-                        bank_account=lot_info["depositPayAccount"],
-                        correspondent_account=lot_info["depositCorAccount"],
-                        auction_url=lot_info.get("etpUrl", ""),
+                for lot_id, lot_info in zip(lot_ids, lot_infos):
+                    if lot_info["category"]["name"] in IGNORE_PROPERTY_CATEGORIES:
+                        continue
+
+                    characteristics = lot_characteristics(lot_info)
+
+                    lots.append(
+                        TorgiLot(
+                            name=lot_info["lotName"],
+                            address=lot_info["estateAddress"],
+                            area=float(characteristics.get("totalAreaRealty", 0)),
+                            price=lot_info["priceMin"],
+                            url=URLs.TORGI_LOG_PAGE.format(lot_id),
+                            notice_number=lot_info["noticeNumber"],
+                            lot_number=lot_info["lotNumber"],
+                            auction_type=lot_info["biddForm"]["name"],
+                            sale_type=lot_info["biddType"]["name"],
+                            law_reference=federal_law_hint(lot_info["npaHintCode"]),
+                            application_start=to_moscow(lot_info["biddStartTime"]),
+                            application_end=to_moscow(lot_info["biddEndTime"]),
+                            auction_start=to_moscow(
+                                lot_info.get("auctionStartDate", FALLBACK_DATETIME_ISO)
+                            ),
+                            cadastral_number=characteristics.get("cadastralNumberRealty", ""),
+                            property_category=lot_info["category"]["name"],
+                            ownership_type=lot_info["ownershipForm"]["name"],
+                            auction_step=lot_info.get("priceStep", 0),
+                            deposit=lot_info.get("deposit", 0),
+                            recipient=lot_info["depositRecipientName"],
+                            recipient_inn=lot_info["depositRecipientINN"],
+                            recipient_kpp=lot_info["depositRecipientKPP"],
+                            bank_name=lot_info["depositBankName"],
+                            bank_bic=lot_info["depositBIK"],
+                            bank_account=lot_info["depositPayAccount"],
+                            correspondent_account=lot_info["depositCorAccount"],
+                            auction_url=lot_info.get("etpUrl", ""),
+                        )
                     )
-                )
 
-            bar.update()
+                bar.update()
 
         return lots
     except Exception:
@@ -699,15 +903,127 @@ def parse_torgi() -> list[TorgiLot]:
         return parse_torgi()
 
 
+def extract_offer_config(offer_page: str) -> str | None:
+    # the card config is cut straight out of the page source: find the <script>
+    # holding the marker by plain string search instead of building any DOM
+    marker_index = offer_page.find(OFFER_CONFIG_MARKER)
+    if marker_index == -1:
+        return None
+
+    script_start = offer_page.find(">", offer_page.rfind("<script", 0, marker_index)) + 1
+    script_end = offer_page.find("</script>", marker_index)
+    if script_end == -1:
+        script_end = len(offer_page)
+
+    script_text = offer_page[script_start:script_end]
+    try:
+        return script_text.strip().split(".concat(", 1)[1].rsplit(");", 1)[0]
+    except IndexError:
+        return None
+
+
+def load_known_offers() -> dict[str, tuple[str, float, float]]:
+    # drops expired records and rewrites the file with the fresh ones only
+    if not OFFER_CACHE_PATH.exists():
+        return {}
+
+    min_parse_time = time.time() - OFFER_CACHE_TTL_SECONDS
+    fresh_records = []
+    for line in OFFER_CACHE_PATH.read_bytes().splitlines():
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            continue
+        if record["time"] >= min_parse_time:
+            fresh_records.append(record)
+
+    OFFER_CACHE_PATH.write_bytes(b"".join(orjson.dumps(record) + b"\n" for record in fresh_records))
+
+    return {
+        record["url"]: (record["address"], record["area"], record["price"])
+        for record in fresh_records
+    }
+
+
+def remember_offer(offer_url: str, offer_fields: tuple[str, float, float]) -> None:
+    known_offers[offer_url] = offer_fields
+
+    address, area, price = offer_fields
+    OFFER_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with OFFER_CACHE_PATH.open("ab") as file:
+        file.write(
+            orjson.dumps(
+                {"url": offer_url, "address": address, "area": area, "price": price, "time": time.time()}
+            )
+            + b"\n"
+        )
+
+
+def parse_offer(offer_url: str) -> tuple[str, float, float] | None:
+    # (address, area, price) of an offer page or None if the page has no usable offer
+    offer_page = get_offer_page(offer_url)
+
+    config_json_string = extract_offer_config(offer_page)
+    if config_json_string is None:
+        return None
+
+    config_json: list[dict] = orjson.loads(config_json_string)
+    offer_info = next(
+        filter(lambda block: block["key"] == "defaultState", config_json)
+    )["value"]
+
+    area: float | None = None
+
+    try:
+        land = offer_info["offerData"]["offer"].get("land")
+        if land is not None:
+            multiplier = LAND_AREA_UNIT_TO_M2.get(land.get("areaUnitType"))
+            if multiplier is not None:
+                area = float(land["area"]) * multiplier
+    except (LookupError, ValueError):
+        pass
+
+    if area is None:
+        area = float(offer_info["offerData"]["offer"].get("totalArea"))
+
+    if area is None:
+        return None
+
+    try:
+        return (
+            offer_info["adfoxOffer"]["response"]["data"]["unicomLinkParams"]["puid14"],
+            area,
+            offer_info["offerData"]["offer"].get(
+                "priceTotalRur",
+                offer_info["offerData"]["offer"].get(
+                    "priceTotalPerMonthRur",
+                    0,
+                ),
+            ),
+        )
+    except Exception:
+        info(f"Something wrong with offer '{offer_url}'")
+        return None
+
+
 def parse_cian_nearby(lots: list[TorgiLot]) -> None:
-    for lot in tqdm(lots, desc="lots on cian"):
+    # geocoding is plain JSON I/O, so all lots are resolved up front in parallel
+    with ThreadPoolExecutor(max_workers=CIAN_FILTER_WORKERS) as executor:
+        search_filters = list(
+            executor.map(
+                lambda lot: unformatted_address_to_cian_search_filter(lot.address),
+                lots,
+            )
+        )
+
+    for lot, search_filter in tqdm(
+        zip(lots, search_filters), total=len(lots), desc="lots on cian"
+    ):
         refresh_main_page()
 
         sale_offers = []
         rent_offers = []
 
-        search_filter = unformatted_address_to_cian_search_filter(lot.address)
-
         for offer_list, offer_dataclass, url, tqdm_desc in [
             (sale_offers, CianSaleOffer, URLs.CIAN_SALE_SEARCH, "sale offers"),
             (
@@ -726,78 +1042,68 @@ def parse_cian_nearby(lots: list[TorgiLot]) -> None:
         ]:
             search_url = url.format(search_filter)
             search_page = driver_get_page(search_url)
-            search_soup = BeautifulSoup(search_page, features="lxml")
             offer_urls = tuple(
-                map(
-                    lambda anchor: anchor["href"],
-                    search_soup.find_all("a", attrs={"data-name": "CommercialTitle"}),
+                lxml_html.fromstring(search_page).xpath(
+                    '//a[@data-name="CommercialTitle"]/@href'
                 )
             )
 
-            for offer_url in tqdm(offer_urls, desc=tqdm_desc, leave=False):
-                offer_page = driver_get_page(offer_url)
-                offer_soup = BeautifulSoup(offer_page, features="lxml")
-
-                try:
-                    script_tag = next(
-                        tag
-                        for tag in offer_soup.find_all("script")
-                        if "window._cianConfig['frontend-offer-card']" in tag.text
-                    )
-                except StopIteration:
-                    continue
-
-                config_json_string = (
-                    script_tag.text.strip().split(".concat(", 1)[1].rsplit(");", 1)[0]
-                )
-                config_json: list[dict] = orjson.loads(config_json_string)
-                offer_info = next(
-                    filter(lambda block: block["key"] == "defaultState", config_json)
-                )["value"]
-
-                area: float | None = None
-
-                try:
-                    if "land" in offer_info["offerData"]["offer"]:
-                        match offer_info["offerData"]["offer"]["land"]["areaUnitType"]:
-                            case "sotka":
-                                area = float(offer_info["offerData"]["offer"]["land"]["area"]) * 100
-                            case "hectare":
-                                area = float(offer_info["offerData"]["offer"]["land"]["area"]) * 10000
-                except (LookupError, ValueError):
-                    pass
-
-                if area is None:
-                    area = float(offer_info["offerData"]["offer"].get("totalArea"))
-
-                if area is None:
+            # unknown offers are fetched and parsed concurrently
+            unknown_offer_urls = [
+                offer_url for offer_url in dict.fromkeys(offer_urls) if offer_url not in known_offers
+            ]
+            with ThreadPoolExecutor(max_workers=CIAN_OFFER_WORKERS) as executor:
+                for offer_url, offer_fields in zip(
+                    unknown_offer_urls,
+                    tqdm(
+                        executor.map(parse_offer, unknown_offer_urls),
+                        total=len(unknown_offer_urls),
+                        desc=tqdm_desc,
+                        leave=False,
+                    ),
+                ):
+                    if offer_fields is not None:
+                        remember_offer(offer_url, offer_fields)
+
+            for offer_url in offer_urls:
+                offer_fields = known_offers.get(offer_url)
+                if offer_fields is None:
                     continue
 
-                try:
-                    offer_list.append(
-                        offer_dataclass(
-                            lot_uuid=lot.uuid,
-                            address=offer_info["adfoxOffer"]["response"]["data"][
-                                "unicomLinkParams"
-                            ]["puid14"],
-                            area=area,
-                            price=offer_info["offerData"]["offer"].get(
-                                "priceTotalRur",
-                                offer_info["offerData"]["offer"].get(
-                                    "priceTotalPerMonthRur",
-                                    0,
-                                ),
-                            ),
-                            url=offer_url,
-                        )
+                address, area, price = offer_fields
+                offer_list.append(
+                    offer_dataclass(
+                        lot_uuid=lot.uuid,
+                        address=address,
+                        area=area,
+                        price=price,
+                        url=offer_url,
                     )
-                except Exception:
-                    info(f"Something wrong with offer '{offer_url}'")
-                    continue
+                )
 
         upload(lots=[lot], sale_offers=sale_offers, rent_offers=rent_offers)
 
 
+class OrjsonModel(JsonModel):
+    # request bodies and responses (whole columns from batchGet) go through orjson
+    def serialize(self, body_value):
+        if isinstance(body_value, dict) and "data" not in body_value and self._data_wrapper:
+            body_value = {"data": body_value}
+
+        return orjson.dumps(body_value).decode()
+
+    def deserialize(self, content):
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().deserialize(content)
+
+        if self._data_wrapper and isinstance(body, dict) and "data" in body:
+            body = body["data"]
+
+        return body
+
+
 def google_auth() -> Resource:
     creds = None
 
@@ -820,7 +1126,7 @@ def google_auth() -> Resource:
 
     GOOGLE_TOKEN_PATH.write_text(creds.to_json())
 
-    return build("sheets", "v4", credentials=creds)
+    return build("sheets", "v4", credentials=creds, model=OrjsonModel())
 
 
 def driver_setup() -> None:
@@ -853,6 +1159,7 @@ def driver_setup() -> None:
 
         driver.get(URLs.CIAN_MAIN_URL)
         time.sleep(3)
+        cian_session_setup()
         first_tab = driver.current_window_handle
 
         def refresh_declaration():
@@ -864,6 +1171,7 @@ def driver_setup() -> None:
                 driver.switch_to.window(first_tab)
                 driver.refresh()
                 time.sleep(3)
+                cian_session_setup()
 
                 driver.switch_to.window(current_tab)
             except Exception:
@@ -880,18 +1188,23 @@ def driver_setup() -> None:
 
 
 def setup() -> None:
-    global service, moscow_district_name_to_cian_id
+    global service, moscow_district_name_to_cian_id, known_offers
 
     service = google_auth()
+    known_offers = load_known_offers()
 
     driver_setup()
 
-    moscow_district_name_to_cian_id = dict(
-        (district["name"], district["id"])
-        if adm_district["type"] == "Okrug"
-        else (adm_district["name"], adm_district["id"])
-        for adm_district in driver_get_json(URLs.CIAN_DISTRICTS)
-        for district in adm_district["childs"]  # oh yeah, perfect english naming
+    moscow_district_name_to_cian_id = cached_json(
+        CACHE_DIR / "moscow_district_name_to_cian_id.json",
+        LOOKUP_CACHE_TTL_SECONDS,
+        lambda: dict(
+            (district["name"], district["id"])
+            if adm_district["type"] == "Okrug"
+            else (adm_district["name"], adm_district["id"])
+            for adm_district in driver_get_json(URLs.CIAN_DISTRICTS)
+            for district in adm_district["childs"]  # oh yeah, perfect english naming
+        ),
     )
 
 
@@ -2,7 +2,10 @@
 """
 Диагностика парсинга площади из Google Sheets
 """
-from parser.google_sheets import _svc, GSHEET_ID
+from parser.google_sheets import _values, GSHEET_ID
+
+# Интересующие нас колонки: id, name, address, area, price, uuid (индекс -> буква)
+IMPORTANT_COLUMNS = {0: "A", 1: "B", 2: "C", 5: "F", 8: "I", 17: "R"}
 
 def diagnose_area_parsing():
     """Диагностирует парсинг площади"""
@@ -13,20 +16,22 @@ def diagnose_area_parsing():
     test_uuid = "fc6c1435-53b1-489e-8437-abf4838f8b8a"
     
     try:
-        # Читаем данные из таблицы
-        result = _svc.spreadsheets().values().get(
+        # Одним запросом читаем заголовки и колонку UUID — по ней находим номер строки
+        result = _values.batchGet(
             spreadsheetId=GSHEET_ID,
-            range="lots_all!A1:AC10"  # Первые 10 строк включая заголовки
+            ranges=["lots_all!A1:AC1", "lots_all!R2:R"]
         ).execute()
         
-        values = result.get('values', [])
+        header_range, uuid_range = result.get('valueRanges', [{}, {}])
+        header_values = header_range.get('values', [])
+        uuid_values = uuid_range.get('values', [])
         
-        if not values:
+        if not header_values and not uuid_values:
             print("❌ Нет данных в таблице")
             return
         
         # Показываем заголовки
-        headers = values[0] if len(values) > 0 else []
+        headers = header_values[0] if header_values else []
         print(f"📋 Заголовки колонок:")
         for i, header in enumerate(headers):
             print(f"   {i:2d}. {header}")
@@ -34,57 +39,72 @@ def diagnose_area_parsing():
         # Ищем нашу строку
         print(f"\n🔍 Ищем строку с UUID: {test_uuid}")
         
-        for row_idx, row in enumerate(values[1:], 1):  # Пропускаем заголовки
-            if len(row) > 17 and row[17] == test_uuid:
-                print(f"✅ Найдена строка {row_idx}:")
-                
-                # Показываем интересные нам колонки
-                important_columns = [0, 1, 2, 5, 8, 17]  # id, name, address, area, price, uuid
-                
-                for col_idx in important_columns:
-                    if col_idx < len(row):
-                        col_name = headers[col_idx] if col_idx < len(headers) else f"Column_{col_idx}"
-                        value = row[col_idx]
-                        print(f"   {col_idx:2d}. {col_name}: '{value}'")
-                
-                # Специально проверяем площадь
-                print(f"\n🔍 АНАЛИЗ ПЛОЩАДИ:")
-                if len(row) > 5:
-                    area_raw = row[5]
-                    print(f"   • Сырое значение: '{area_raw}'")
-                    print(f"   • Тип: {type(area_raw)}")
-                    print(f"   • Длина: {len(area_raw)}")
-                    
-                    # Пробуем разные способы парсинга
-                    print(f"   • Попытки парсинга:")
-                    
-                    try:
-                        # Способ 1: прямое преобразование
-                        area1 = float(area_raw)
-                        print(f"     1. float(area_raw): {area1}")
-                    except:
-                        print(f"     1. float(area_raw): ОШИБКА")
-                    
-                    try:
-                        # Способ 2: убираем ' м²'
-                        area2 = float(area_raw.replace(' м²', ''))
-                        print(f"     2. После удаления ' м²': {area2}")
-                    except:
-                        print(f"     2. После удаления ' м²': ОШИБКА")
-                    
-                    try:
-                        # Способ 3: убираем все нечисловые символы кроме точки и запятой
-                        import re
-                        area_clean = re.sub(r'[^0-9.,]', '', area_raw)
-                        area_clean = area_clean.replace(',', '.')
-                        area3 = float(area_clean) if area_clean else 0
-                        print(f"     3. Очищенное значение '{area_clean}': {area3}")
-                    except:
-                        print(f"     3. Очищенное значение: ОШИБКА")
-                
-                return
+        # UUID -> номер строки в таблице (данные начинаются со 2-й строки, при дублях берём первую)
+        uuid_to_row = {}
+        for row_num, cell in enumerate(uuid_values, 2):
+            if cell:
+                uuid_to_row.setdefault(cell[0], row_num)
+        row_num = uuid_to_row.get(test_uuid)
+        
+        if row_num is None:
+            print(f"❌ Строка с UUID {test_uuid} не найдена")
+            return
+        
+        # Читаем только найденную строку и только нужные колонки
+        result = _values.batchGet(
+            spreadsheetId=GSHEET_ID,
+            ranges=[f"lots_all!{letter}{row_num}" for letter in IMPORTANT_COLUMNS.values()]
+        ).execute()
+        
+        row = {}
+        for col_idx, value_range in zip(IMPORTANT_COLUMNS, result.get('valueRanges', [])):
+            cells = value_range.get('values', [])
+            if cells and cells[0]:
+                row[col_idx] = cells[0][0]
+        
+        print(f"✅ Найдена строка {row_num - 1}:")
+        
+        # Показываем интересные нам колонки
+        for col_idx in IMPORTANT_COLUMNS:
+            if col_idx in row:
+                col_name = headers[col_idx] if col_idx < len(headers) else f"Column_{col_idx}"
+                value = row[col_idx]
+                print(f"   {col_idx:2d}. {col_name}: '{value}'")
         
-        print(f"❌ Строка с UUID {test_uuid} не найдена")
+        # Специально проверяем площадь
+        print(f"\n🔍 АНАЛИЗ ПЛОЩАДИ:")
+        if 5 in row:
+            area_raw = row[5]
+            print(f"   • Сырое значение: '{area_raw}'")
+            print(f"   • Тип: {type(area_raw)}")
+            print(f"   • Длина: {len(area_raw)}")
+            
+            # Пробуем разные способы парсинга
+            print(f"   • Попытки парсинга:")
+            
+            try:
+                # Способ 1: прямое преобразование
+                area1 = float(area_raw)
+                print(f"     1. float(area_raw): {area1}")
+            except:
+                print(f"     1. float(area_raw): ОШИБКА")
+            
+            try:
+                # Способ 2: убираем ' м²'
+                area2 = float(area_raw.replace(' м²', ''))
+                print(f"     2. После удаления ' м²': {area2}")
+            except:
+                print(f"     2. После удаления ' м²': ОШИБКА")
+            
+            try:
+                # Способ 3: убираем все нечисловые символы кроме точки и запятой
+                import re
+                area_clean = re.sub(r'[^0-9.,]', '', area_raw)
+                area_clean = area_clean.replace(',', '.')
+                area3 = float(area_clean) if area_clean else 0
+                print(f"     3. Очищенное значение '{area_clean}': {area3}")
+            except:
+                print(f"     3. Очищенное значение: ОШИБКА")
         
     except Exception as e:
         print(f"❌ Ошибка: {e}")
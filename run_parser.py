@@ -7,25 +7,28 @@ This script extracts street IDs from CIAN for Moscow and Moscow Oblast addresses
 using CIAN's geocoding API.
 """
 
-from multiprocessing import process
 import os
 import re
 import time
 import logging
 import json
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import argparse
+from functools import lru_cache
 from typing import Dict, Optional, List, Tuple, Any
 
-import fuzzywuzzy
+import orjson
+import requests
+from rapidfuzz import fuzz, process, utils
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import undetected_chromedriver as uc
 from fake_useragent import UserAgent
 
+from core.geocode_cache import GeocodeCache
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -43,31 +46,63 @@ from pathlib import Path
 from typing import Dict, Optional, Union
 
 # Add these constants after the other CIAN URLs
-STREETS_FILE = Path("parser/data/cian_street_ids_simple.json")
+# Street name -> ID mapping used for local lookups (the simplified file written by save_streets_data)
+STREET_IDS_FILE = Path("parser/data/cian_street_ids_simple.json")
 STREETS_DETAILED_FILE = Path("parser/data/cian_streets_database.json")
 
+# Extracted street: (street ID, street name, region type "moscow" or "mo")
+StreetResult = Tuple[str, str, str]
+
 # Global variable to store street mapping
 street_name_to_id_mapping: Dict[str, str] = {}
+# Normalized street name (lowercase, without region) -> ID, built together with the mapping
+street_name_lookup: Dict[str, str] = {}
+# Street names preprocessed for fuzzy matching and their IDs (same order as street_name_lookup)
+street_fuzzy_names: List[str] = []
+street_fuzzy_ids: List[str] = []
+# Street ID -> (street name, region type), so a local match is recorded like a geocoded one
+street_id_to_entry: Dict[str, Tuple[str, str]] = {}
+
+def split_street_key(full_name: str) -> Tuple[str, str]:
+    """Split a mapping key like "Тверская улица (Москва)" into street name and region type"""
+    street_name, _, region = full_name.partition(" (")
+    return street_name, "moscow" if region.startswith("Москва") else "mo"
+
+def build_street_lookup(mapping: Dict[str, str]) -> Dict[str, str]:
+    """Build normalized street name -> ID lookup (the first entry wins, as in a linear scan)"""
+    lookup = {}
+    for full_name, street_id in mapping.items():
+        lookup.setdefault(full_name.split(" (")[0].lower(), street_id)
+    return lookup
 
 def load_street_ids() -> Dict[str, str]:
     """Load street ID mapping from file"""
-    global street_name_to_id_mapping
+    global street_name_to_id_mapping, street_name_lookup, street_fuzzy_names, street_fuzzy_ids, street_id_to_entry
     
     if street_name_to_id_mapping:
         # Already loaded
         return street_name_to_id_mapping
     
     try:
-        if STREETS_FILE.exists():
-            with open(STREETS_FILE, "r", encoding="utf-8") as f:
-                street_name_to_id_mapping = json.load(f)
-                log.info(f"Loaded {len(street_name_to_id_mapping)} street IDs from {STREETS_FILE}")
+        if STREET_IDS_FILE.exists():
+            mapping = orjson.loads(STREET_IDS_FILE.read_bytes())
+            log.info(f"Loaded {len(mapping)} street IDs from {STREET_IDS_FILE}")
         else:
-            log.warning(f"Street ID mapping file not found: {STREETS_FILE}")
-            street_name_to_id_mapping = {}
+            log.warning(f"Street ID mapping file not found: {STREET_IDS_FILE}")
+            mapping = {}
     except Exception as e:
         log.error(f"Error loading street IDs: {e}")
-        street_name_to_id_mapping = {}
+        mapping = {}
+    
+    # The lookup is published first: other threads treat a non-empty mapping as fully loaded
+    street_name_lookup = build_street_lookup(mapping)
+    street_fuzzy_names = [utils.default_process(name) for name in street_name_lookup]
+    street_fuzzy_ids = list(street_name_lookup.values())
+    entries = {}
+    for full_name, street_id in mapping.items():
+        entries.setdefault(street_id, split_street_key(full_name))
+    street_id_to_entry = entries
+    street_name_to_id_mapping = mapping
         
     return street_name_to_id_mapping
 
@@ -75,11 +110,67 @@ def load_street_ids() -> Dict[str, str]:
 OUTPUT_DIR = Path("parser/data")
 STREETS_FILE = OUTPUT_DIR / "cian_streets_database.json"
 
+# Cached responses of CIAN geocoding endpoints, so re-runs skip known addresses
+GEO_CACHE_TTL = 7 * 86400
+geo_cache = GeocodeCache(str(OUTPUT_DIR / "cian_geo_cache.db"))
+
 # CIAN API URLs
 CIAN_MAIN_URL = "https://cian.ru/"
 CIAN_GEOCODE = "https://www.cian.ru/api/geo/geocode-cached/?request={}"
 CIAN_GEOCODE_FOR_SEARCH = "https://www.cian.ru/api/geo/geocoded-for-search/"
 
+# Words that mark a street in geocoding details, matched in one regex scan per name
+STREET_MARKER_PATTERN = re.compile(
+    "улица|переулок|проспект|проезд|шоссе|бульвар|площадь|набережная",
+    re.IGNORECASE
+)
+
+# Async script for the browser fallback: fetches a URL from the page context and returns the body.
+# Arguments: url, form fields to POST (null for GET)
+FETCH_TEXT_SCRIPT = """
+const done = arguments[arguments.length - 1];
+const options = {credentials: "include"};
+if (arguments[1]) {
+    options.method = "POST";
+    options.body = new URLSearchParams(arguments[1]);
+}
+fetch(arguments[0], options)
+    .then(response => response.text())
+    .then(done);
+"""
+
+# Street type followed by the street name, e.g. "ул. Тверская," -> "Тверская"
+STREET_PATTERN = re.compile(
+    r'(?:улица|ул\.|ул'
+    r'|проспект|пр-т|пр-кт'
+    r'|бульвар|б-р'
+    r'|шоссе|ш\.'
+    r'|переулок|пер\.|пер'
+    r'|набережная|наб\.|наб'
+    r'|проезд|пр-д'
+    r'|площадь|пл\.)'
+    r'\s+([А-Яа-я\-\s]+?)(?:,|\d|$)'
+)
+
+# Timeout for direct HTTP requests to CIAN JSON endpoints (seconds)
+REQUEST_TIMEOUT = 10
+
+# Persistent Chrome profile: CIAN cookies survive restarts, so the anti-bot check isn't repeated
+CHROME_PROFILE_DIR = Path(".cache/cian_street_parser_chrome")
+
+# Attempts to start Chrome before giving up
+MAX_DRIVER_RETRIES = 5
+
+# Failed browser requests recovered by refreshing the same browser before restarting it
+SAME_DRIVER_RETRIES = 2
+# Browser requests after which Chrome is restarted to release accumulated memory
+BROWSER_RECYCLE_REQUESTS = 500
+
+# Number of addresses processed concurrently
+ADDRESS_WORKERS = 8
+# Geocoded addresses between intermediate saves of the streets data
+SAVE_EVERY = 100
+
 # Test addresses for parsing
 TEST_ADDRESSES = [
     "г Москва, Пресненская набережная, дом 12",
@@ -108,10 +199,22 @@ streets_data = {
 }
 
 
+@lru_cache(maxsize=1)
+def chrome_user_agents() -> UserAgent:
+    """Shared fake_useragent instance: its browser data is loaded once, not on every driver start"""
+    return UserAgent(browsers=["Chrome"])
+
+
 class CianStreetParser:
     def __init__(self, headless=True):
         """Initialize the CIAN parser with a Chrome driver"""
         self.driver = None
+        self.session: Optional[requests.Session] = None
+        # The browser is shared between worker threads and is only used as a fallback
+        self.driver_lock = threading.RLock()
+        self.headless = headless
+        # Requests made by the current browser instance, it is recycled periodically
+        self.browser_requests = 0
         self.initialize_driver(headless)
         
     def __del__(self):
@@ -120,61 +223,150 @@ class CianStreetParser:
     
     def initialize_driver(self, headless=True):
         """Initialize Chrome driver with appropriate settings"""
-        logger.info("Initializing Chrome driver...")
-        
-        try:
-            # Close existing driver if there is one
-            self.close_driver()
+        for attempt in range(MAX_DRIVER_RETRIES):
+            logger.info("Initializing Chrome driver...")
             
-            # Configure Chrome options
-            options = uc.ChromeOptions()
-            options.add_argument(f"--user-agent={UserAgent(browsers=['Chrome']).random}")
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            
-            if headless:
-                options.add_argument("--headless")
-            
-            options.page_load_strategy = "eager"
-            
-            # Create driver
-            self.driver = uc.Chrome(options=options)
-            self.driver.set_page_load_timeout(30)
-            
-            # Load CIAN main page to initialize session
-            self.driver.get(CIAN_MAIN_URL)
-            time.sleep(2)
-            
-            logger.info("Chrome driver initialized successfully")
-            
-        except Exception as e:
-            logger.error(f"Error initializing driver: {e}")
-            # Add recursive retry with longer delay
-            time.sleep(5)
-            self.initialize_driver(headless)
+            try:
+                # Close existing driver if there is one
+                self.close_driver()
+                
+                # Configure Chrome options
+                options = uc.ChromeOptions()
+                options.add_argument(f"--user-agent={chrome_user_agents().random}")
+                options.add_argument("--disable-blink-features=AutomationControlled")
+                
+                if headless:
+                    options.add_argument("--headless")
+                
+                options.page_load_strategy = "eager"
+                
+                # Create driver
+                self.driver = uc.Chrome(options=options, user_data_dir=str(CHROME_PROFILE_DIR))
+                self.driver.set_page_load_timeout(30)
+                self.driver.set_script_timeout(REQUEST_TIMEOUT)
+                
+                # Load CIAN main page to initialize session
+                self.driver.get(CIAN_MAIN_URL)
+                time.sleep(2)
+                self.setup_session()
+                self.browser_requests = 0
+                
+                logger.info("Chrome driver initialized successfully")
+                return
+                
+            except Exception as e:
+                logger.error(f"Error initializing driver (attempt {attempt + 1}/{MAX_DRIVER_RETRIES}): {e}")
+                # Don't leave a half-started browser behind, then retry with a longer delay
+                self.close_driver()
+                if attempt < MAX_DRIVER_RETRIES - 1:
+                    time.sleep(2 ** attempt)
+        
+        raise RuntimeError(f"Failed to initialize Chrome driver after {MAX_DRIVER_RETRIES} attempts")
     
     def close_driver(self):
         """Close the browser driver"""
         if self.driver:
             try:
                 self.driver.quit()
-                self.driver = None
                 logger.info("Driver closed")
             except:
                 pass
+            self.driver = None
     
-    def get_json(self, url: str, retries: int = 0) -> dict:
-        """Get JSON data from a URL with retry mechanism"""
-        try:
-            self.driver.get(url)
-            
-            # Wait for JSON response
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "pre"))
+    def refresh_browser_session(self):
+        """Reload the CIAN main page with fresh cookies in the current browser"""
+        self.driver.delete_all_cookies()
+        self.driver.get(CIAN_MAIN_URL)
+        time.sleep(2)
+        self.setup_session()
+    
+    def recover_driver(self, failures: int):
+        """
+        Recover the browser after a failed request
+        
+        The current browser is refreshed first (seconds), it is only restarted
+        if that already failed SAME_DRIVER_RETRIES times or the refresh itself fails
+        """
+        if failures < SAME_DRIVER_RETRIES:
+            try:
+                self.refresh_browser_session()
+                return
+            except Exception as e:
+                logger.warning(f"Failed to refresh browser session: {e}")
+        
+        self.initialize_driver(self.headless)
+    
+    def count_browser_request(self):
+        """Count a browser request and restart the browser once it has served too many"""
+        if self.browser_requests >= BROWSER_RECYCLE_REQUESTS:
+            logger.info(f"Recycling browser after {self.browser_requests} requests")
+            self.initialize_driver(self.headless)
+        self.browser_requests += 1
+    
+    def setup_session(self):
+        """Create an HTTP session that reuses the browser's cookies and user agent"""
+        session = requests.Session()
+        session.headers.update({
+            "User-Agent": self.driver.execute_script("return navigator.userAgent"),
+            "Referer": CIAN_MAIN_URL,
+            "Accept": "application/json",
+        })
+        for cookie in self.driver.get_cookies():
+            session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain"),
+                path=cookie.get("path", "/"),
             )
+        
+        self.session = session
+    
+    def session_request_json(self, method: str, url: str, body: Optional[dict] = None) -> Optional[dict]:
+        """
+        Send a request to a JSON endpoint through the HTTP session
+        
+        Returns:
+            Parsed JSON, or None if CIAN answered with an error or a non-JSON (anti-bot) page
+        """
+        if self.session is None:
+            return None
+        
+        try:
+            response = self.session.request(method, url, data=body, timeout=REQUEST_TIMEOUT)
+            if response.ok:
+                return response.json()
+            logger.warning(f"HTTP {response.status_code} from {url}, falling back to browser")
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"HTTP request to {url} failed ({e}), falling back to browser")
+        
+        return None
+    
+    def get_json(self, url: str) -> dict:
+        """Get JSON data from a URL, using the browser only if the HTTP session is rejected"""
+        cache_key = f"GET {url}"
+        is_hit, cached = geo_cache.get(cache_key)
+        if is_hit:
+            return cached
+        
+        json_data = self.session_request_json("GET", url)
+        if json_data is None:
+            with self.driver_lock:
+                json_data = self.browser_get_json(url)
+        
+        if json_data:
+            geo_cache.set(cache_key, json_data, GEO_CACHE_TTL)
+        return json_data
+    
+    def browser_get_json(self, url: str, retries: int = 0) -> dict:
+        """Get JSON data from a URL through the browser with retry mechanism"""
+        try:
+            self.count_browser_request()
+            # Fetch from the already open CIAN page (same origin, browser cookies)
+            # instead of navigating to the URL and waiting for the rendered <pre>
+            raw = self.driver.execute_async_script(FETCH_TEXT_SCRIPT, url, None)
             
             # Parse JSON data
             try:
-                raw = self.driver.find_element(By.TAG_NAME, "pre").text
                 return json.loads(raw)
             except Exception as e:
                 logger.error(f"Error parsing JSON from {url}: {e}")
@@ -182,17 +374,16 @@ class CianStreetParser:
                 # Retry
                 if retries < 3:
                     time.sleep(2)
-                    return self.get_json(url, retries + 1)
+                    return self.browser_get_json(url, retries + 1)
                 return {}
                 
         except Exception as e:
             logger.error(f"Error fetching data from {url}: {e}")
             
-            # Re-initialize driver and retry
+            # Recover driver and retry
             if retries < 3:
-                self.initialize_driver()
-                time.sleep(2)
-                return self.get_json(url, retries + 1)
+                self.recover_driver(retries)
+                return self.browser_get_json(url, retries + 1)
             return {}
     def find_street_id(self, street_name: str) -> Optional[str]:
         """
@@ -208,27 +399,20 @@ class CianStreetParser:
             return None
         
         # Load street mapping if not already loaded
-        street_mapping = load_street_ids()
-        if not street_mapping:
+        if not load_street_ids():
             return None
         
         # Normalize street name for lookup
         street_name_lower = street_name.lower().strip()
         
         # Try direct match first
-        for full_name, street_id in street_mapping.items():
-            # Extract street name without region
-            name_part = full_name.split(" (")[0].lower()
-            
-            # Check for exact match
-            if name_part == street_name_lower:
-                log.info(f"Found exact street match: '{street_name}' -> ID: {street_id}")
-                return street_id
+        if street_name_lower in street_name_lookup:
+            street_id = street_name_lookup[street_name_lower]
+            log.info(f"Found exact street match: '{street_name}' -> ID: {street_id}")
+            return street_id
         
         # Try partial match if exact match failed
-        for full_name, street_id in street_mapping.items():
-            name_part = full_name.split(" (")[0].lower()
-            
+        for name_part, street_id in street_name_lookup.items():
             # Check for inclusion
             if street_name_lower in name_part or name_part in street_name_lower:
                 log.info(f"Found partial street match: '{street_name}' ~ '{name_part}' -> ID: {street_id}")
@@ -236,115 +420,107 @@ class CianStreetParser:
                 
         # Try fuzzy matching
         try:
+            # Names are preprocessed once on load, only the query is processed here
             best_match = process.extractOne(
-                street_name_lower,
-                [name.split(" (")[0].lower() for name in street_mapping.keys()],
-                scorer=fuzzywuzzy.token_sort_ratio,
+                utils.default_process(street_name_lower),
+                street_fuzzy_names,
+                scorer=fuzz.token_sort_ratio,
+                processor=None,
                 score_cutoff=85
             )
             
             if best_match:
-                matched_name = best_match[0]
-                # Find the original key with this name
-                for full_name, street_id in street_mapping.items():
-                    if full_name.split(" (")[0].lower() == matched_name:
-                        log.info(f"Found fuzzy street match: '{street_name}' ~ '{matched_name}' -> ID: {street_id}")
-                        return street_id
+                matched_name, _, index = best_match
+                street_id = street_fuzzy_ids[index]
+                log.info(f"Found fuzzy street match: '{street_name}' ~ '{matched_name}' -> ID: {street_id}")
+                return street_id
         except Exception as e:
             log.warning(f"Error in fuzzy matching for '{street_name}': {e}")
             
         return None
-    def post_json(self, url: str, body: dict, retries: int = 0) -> dict:
-        """Send POST request and get JSON response"""
+    def post_json(self, url: str, body: dict) -> dict:
+        """Send POST request and get JSON response, using the browser only if the HTTP session is rejected"""
+        cache_key = f"POST {url} {json.dumps(body, sort_keys=True)}"
+        is_hit, cached = geo_cache.get(cache_key)
+        if is_hit:
+            return cached
+        
+        json_data = self.session_request_json("POST", url, body)
+        if json_data is None:
+            with self.driver_lock:
+                json_data = self.browser_post_json(url, body)
+        
+        if json_data:
+            geo_cache.set(cache_key, json_data, GEO_CACHE_TTL)
+        return json_data
+    
+    def browser_post_json(self, url: str, body: dict, retries: int = 0) -> dict:
+        """Send POST request through the browser and get JSON response"""
         try:
-            # Execute JavaScript to submit the form
-            self.driver.execute_script(
-                """
-                function post(path, params) {
-                    const form = document.createElement('form');
-                    form.method = 'post';
-                    form.action = path;
-                    
-                    for (const key in params) {
-                        if (params.hasOwnProperty(key)) {
-                            const hiddenField = document.createElement('input');
-                            hiddenField.type = 'hidden';
-                            hiddenField.name = key;
-                            hiddenField.value = params[key];
-                            form.appendChild(hiddenField);
-                        }
-                    }
-                    
-                    document.body.appendChild(form);
-                    form.submit();
-                }
-                
-                post(arguments[1], arguments[0]);
-                """, 
-                body, url
-            )
+            self.count_browser_request()
             
-            # Wait for response
-            time.sleep(2)
+            # POST from the already open CIAN page instead of submitting a form
+            # and waiting for the response page to render
+            raw = self.driver.execute_async_script(FETCH_TEXT_SCRIPT, url, body)
             
             # Parse JSON response
             try:
-                raw = self.driver.find_element(By.TAG_NAME, "pre").text
                 return json.loads(raw)
             except Exception as e:
                 logger.error(f"Error parsing JSON response: {e}")
                 
                 if retries < 3:
                     time.sleep(2)
-                    return self.post_json(url, body, retries + 1)
+                    return self.browser_post_json(url, body, retries + 1)
                 return {}
                 
         except Exception as e:
             logger.error(f"Error sending POST request to {url}: {e}")
             
             if retries < 3:
-                self.initialize_driver()
-                time.sleep(2)
-                return self.post_json(url, body, retries + 1)
+                self.recover_driver(retries)
+                return self.browser_post_json(url, body, retries + 1)
             return {}
     
-    def extract_street_id_from_address(self, address: str) -> Optional[str]:
+    def find_local_street_id(self, address: str) -> Optional[StreetResult]:
+        """
+        Find street ID from the street name in the address text, without network requests
+        
+        Args:
+            address: Address text to process
+            
+        Returns:
+            (street ID, street name, region type) if found in the local mapping, None otherwise
+        """
+        # Try common street patterns
+        match = STREET_PATTERN.search(address)
+        if not match:
+            return None
+        
+        street_id = self.find_street_id(match.group(1).strip())
+        if not street_id:
+            return None
+        
+        street_name, region_type = street_id_to_entry[street_id]
+        return street_id, street_name, region_type
+    
+    def extract_street_id_from_address(self, address: str, check_local: bool = True) -> Optional[StreetResult]:
         """
         Extract street ID from an address using CIAN's geocoding API
         
         Args:
             address: Address text to process
+            check_local: Look the street up in the local mapping before geocoding
             
         Returns:
-            Street ID if found, None otherwise
+            (street ID, street name, region type) if found, None otherwise
         """
         try:
-            # Step 1: Extract street name from address
-            street_name = None
-            
-            # Try common street patterns
-            street_patterns = [
-                r'(?:улица|ул\.|ул)\s+([А-Яа-я\-\s]+?)(?:,|\d|$)',
-                r'(?:проспект|пр-т|пр-кт)\s+([А-Яа-я\-\s]+?)(?:,|\d|$)',
-                r'(?:бульвар|б-р)\s+([А-Яа-я\-\s]+?)(?:,|\d|$)',
-                r'(?:шоссе|ш\.)\s+([А-Яа-я\-\s]+?)(?:,|\d|$)',
-                r'(?:переулок|пер\.|пер)\s+([А-Яа-я\-\s]+?)(?:,|\d|$)',
-                r'(?:набережная|наб\.|наб)\s+([А-Яа-я\-\s]+?)(?:,|\д|$)',
-                r'(?:проезд|пр-д)\s+([А-Яа-я\-\s]+?)(?:,|\д|$)',
-                r'(?:площадь|пл\.)\s+([А-Яа-я\-\s]+?)(?:,|\д|$)'
-            ]
-            
-            for pattern in street_patterns:
-                match = re.search(pattern, address)
-                if match:
-                    street_name = match.group(1).strip()
-                    break
-            
-            # If we found a street name directly in the address, try to look it up
-            if street_name:
-                street_id = self.find_street_id(street_name)
-                if street_id:
-                    return street_id
+            # Step 1: If the street name is in the address, try to look it up locally
+            if check_local:
+                local_result = self.find_local_street_id(address)
+                if local_result:
+                    return local_result
             
             # Step 2: If direct lookup failed, use geocoding
             geocoding_response = self.get_json(CIAN_GEOCODE.format(address))
@@ -365,6 +541,8 @@ class CianStreetParser:
                 log.warning(f"No Moscow/MO results for address: {address}")
                 return None
             
+            region_type = "moscow" if geocoding_result.get("text", "").startswith("Россия, Москва") else "mo"
+            
             # Get coordinates
             lon, lat = geocoding_result.get("coordinates", [0, 0])
             
@@ -386,20 +564,15 @@ class CianStreetParser:
             details = api_result["details"]
             
             # Find street information (usually the last element)
-            for i in range(len(details)-1, -1, -1):
-                if "id" in details[i] and "fullName" in details[i]:
-                    name_lower = details[i]["fullName"].lower()
-                    
+            for detail in reversed(details):
+                if "id" in detail and "fullName" in detail:
                     # Check if this is a street
-                    street_markers = ["улица", "переулок", "проспект", "проезд", 
-                                    "шоссе", "бульвар", "площадь", "набережная"]
-                    
-                    if any(marker in name_lower for marker in street_markers):
-                        street_id = details[i]["id"]
-                        street_name = details[i]["fullName"]
+                    if STREET_MARKER_PATTERN.search(detail["fullName"]):
+                        street_id = detail["id"]
+                        street_name = detail["fullName"]
                         
                         log.info(f"Found street via geocoding: {street_name} (ID: {street_id})")
-                        return street_id
+                        return street_id, street_name, region_type
             
             # If no specific street found, try the last element
             if details and "id" in details[-1]:
@@ -407,7 +580,7 @@ class CianStreetParser:
                 street_name = details[-1].get("fullName", "Unknown")
                 
                 log.info(f"Using last element as street: {street_name} (ID: {street_id})")
-                return street_id
+                return street_id, street_name, region_type
                 
         except Exception as e:
             log.error(f"Error extracting street ID for address {address}: {e}")
@@ -415,6 +588,13 @@ class CianStreetParser:
         return None
 
 
+def write_json_atomic(path: Path, data: Any):
+    """Write JSON through a temporary file, so an interrupted save never leaves a truncated file"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, path)
+
+
 def save_streets_data():
     """Save the collected streets data to a JSON file"""
     # Create output directory if it doesn't exist
@@ -428,8 +608,7 @@ def save_streets_data():
     )
     
     # Save the data
-    with open(STREETS_FILE, "w", encoding="utf-8") as f:
-        json.dump(streets_data, f, ensure_ascii=False, indent=2)
+    write_json_atomic(STREETS_FILE, streets_data)
     
     # Create a simplified version with just street name -> ID mapping
     simplified = {}
@@ -439,8 +618,7 @@ def save_streets_data():
     for street_name, street_id in streets_data["mo"]["streets"].items():
         simplified[f"{street_name} (МО)"] = street_id
     
-    with open(OUTPUT_DIR / "cian_street_ids_simple.json", "w", encoding="utf-8") as f:
-        json.dump(simplified, f, ensure_ascii=False, indent=2)
+    write_json_atomic(OUTPUT_DIR / "cian_street_ids_simple.json", simplified)
     
     logger.info(f"Saved {streets_data['metadata']['streets_count']} streets to {STREETS_FILE}")
 
@@ -454,8 +632,7 @@ def load_streets_data():
         return False
     
     try:
-        with open(STREETS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = orjson.loads(STREETS_FILE.read_bytes())
         
         if not isinstance(data, dict) or "moscow" not in data or "mo" not in data:
             logger.warning("Invalid data format in streets data file")
@@ -470,24 +647,49 @@ def load_streets_data():
         return False
 
 
+def process_address(address: str, parser: CianStreetParser):
+    """Geocode a single address that was not resolved locally (runs in a worker thread)"""
+    # Sleep to avoid rate limiting: each worker pauses before its requests
+    time.sleep(random.uniform(1, 3))
+    
+    return parser.extract_street_id_from_address(address, check_local=False)
+
+
+def record_street_result(address: str, result: Optional[StreetResult]):
+    """Store an extracted street in the collected streets data"""
+    street_id, street_name, region_type = result or (None, None, None)
+    
+    if street_id and street_name and region_type:
+        # Store in the appropriate region
+        if region_type == "moscow":
+            streets_data["moscow"]["streets"][street_name] = street_id
+            logger.info(f"Added Moscow street: {street_name} (ID: {street_id})")
+        else:  # mo
+            streets_data["mo"]["streets"][street_name] = street_id
+            logger.info(f"Added MO street: {street_name} (ID: {street_id})")
+    else:
+        logger.warning(f"Failed to extract street ID for address: {address}")
+
+
 def process_addresses(addresses: List[str], parser: CianStreetParser):
     """Process a list of addresses to extract street IDs"""
-    for address in addresses:
-        # Sleep to avoid rate limiting
-        time.sleep(random.uniform(1, 3))
-        
-        street_id, street_name, region_type = parser.extract_street_id_from_address(address)
-        
-        if street_id and street_name and region_type:
-            # Store in the appropriate region
-            if region_type == "moscow":
-                streets_data["moscow"]["streets"][street_name] = street_id
-                logger.info(f"Added Moscow street: {street_name} (ID: {street_id})")
-            else:  # mo
-                streets_data["mo"]["streets"][street_name] = street_id
-                logger.info(f"Added MO street: {street_name} (ID: {street_id})")
-        else:
-            logger.warning(f"Failed to extract street ID for address: {address}")
+    # Local pass first: addresses found in the street mapping need no requests and no throttling
+    results = {address: parser.find_local_street_id(address) for address in addresses}
+    remaining = [address for address, result in results.items() if not result]
+    logger.info(f"Resolved {len(results) - len(remaining)} addresses locally, {len(remaining)} need geocoding")
+    
+    for address, result in results.items():
+        if result:
+            record_street_result(address, result)
+    
+    with ThreadPoolExecutor(max_workers=ADDRESS_WORKERS) as pool:
+        results_stream = pool.map(lambda address: process_address(address, parser), remaining)
+        for processed, (address, result) in enumerate(zip(remaining, results_stream), 1):
+            record_street_result(address, result)
+            
+            # Checkpoint periodically, so an interrupted long run keeps its progress
+            if processed % SAVE_EVERY == 0:
+                save_streets_data()
     
     # Save after processing all addresses
     save_streets_data()
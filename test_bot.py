@@ -4,17 +4,60 @@
 # filepath: test_bot.py
 
 import asyncio
+import functools
 import logging
 import sys
+from datetime import datetime
 from pathlib import Path
+from uuid import UUID
 
 sys.path.append(str(Path(__file__).parent))
 
 from bot.bot_service import bot_service
+from core.models import Lot
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Фиксированные значения, чтобы тестовый лот был одинаковым от запуска к запуску
+TEST_LOT_UUID = UUID("00000000-0000-0000-0000-000000000001")
+_NOW = datetime.now()
+
+@functools.cache
+def _make_test_lot() -> Lot:
+    """Собирает тестовый лот один раз на модуль"""
+    return Lot(
+        id="test_001",
+        name="Тестовый лот",
+        address="Москва, Тверская, 1",
+        coords=None,
+        area=100.0,
+        price=5000000,
+        notice_number="TEST-001",
+        lot_number=1,
+        auction_type="Электронный аукцион",
+        sale_type="Продажа",
+        law_reference="",
+        application_start=_NOW,
+        application_end=_NOW,
+        auction_start=_NOW,
+        cadastral_number="",
+        property_category="Нежилые помещения",
+        ownership_type="",
+        auction_step=0.0,
+        deposit=0.0,
+        recipient="",
+        recipient_inn="",
+        recipient_kpp="",
+        bank_name="",
+        bank_bic="",
+        bank_account="",
+        correspondent_account="",
+        auction_url="",
+        uuid=TEST_LOT_UUID,
+        annual_yield_percent=25.0
+    )
+
 async def test_bot():
     """Тестирует бота отдельно"""
     logger.info("🤖 Тестирование Telegram бота")
@@ -31,16 +74,8 @@ async def test_bot():
         await bot_service.send_daily_summary(15, 3)
         logger.info("✅ Ежедневная сводка отправлена")
         
-        # Тест уведомления о лотах (создаем тестовый лот)
-        from core.models import Lot
-        test_lot = Lot(
-            id="test_001",
-            name="Тестовый лот",
-            address="Москва, Тверская, 1",
-            area=100.0,
-            price=5000000,
-            annual_yield_percent=25.0
-        )
+        # Тест уведомления о лотах
+        test_lot = _make_test_lot()
         await bot_service.notify_new_lots([test_lot])
         logger.info("✅ Уведомление о тестовом лоте отправлено")
         
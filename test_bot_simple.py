@@ -4,7 +4,9 @@
 """
 import asyncio
 import logging
+import os
 from aiogram import Bot
+from core.config import CONFIG
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -12,14 +14,18 @@ logger = logging.getLogger(__name__)
 async def test_bot():
     """Тестируем подключение к боту"""
     try:
-        bot_token = "7927196434:AAFFuvxIGSI3IWnkYbyNrEUPUAhdVsvoEnQ"
-        bot = Bot(token=bot_token)
+        # Токен берём из окружения или config.yaml — тот же, что использует bot_service
+        bot_token = os.environ.get("TELEGRAM_BOT_TOKEN") or CONFIG.get('telegram_bot_token')
+        if not bot_token:
+            logger.error("❌ Токен бота не задан (TELEGRAM_BOT_TOKEN или config.yaml)")
+            return False
         
-        # Проверяем подключение
-        me = await bot.get_me()
-        logger.info(f"✅ Бот подключен успешно: {me.first_name} (@{me.username})")
+        # Сессия закрывается при выходе из блока, в том числе при ошибке
+        async with Bot(token=bot_token) as bot:
+            # Проверяем подключение
+            me = await bot.get_me()
+            logger.info(f"✅ Бот подключен успешно: {me.first_name} (@{me.username})")
         
-        await bot.session.close()
         return True
         
     except Exception as e:
@@ -0,0 +1,54 @@
+"""
+Tests for the CIAN street ID parser: addresses resolved from the local street mapping
+"""
+import orjson
+
+import run_parser
+from run_parser import CianStreetParser
+
+
+def make_parser() -> CianStreetParser:
+    """Parser without a browser: the local pass needs no network"""
+    parser = CianStreetParser.__new__(CianStreetParser)
+    parser.driver = None
+    return parser
+
+
+def test_local_pass_records_mapped_street(tmp_path, monkeypatch):
+    street_ids_file = tmp_path / "cian_street_ids_simple.json"
+    street_ids_file.write_bytes(orjson.dumps({
+        "Тверская (Москва)": "1234",
+        "Загородная (МО)": "5678",
+    }))
+    monkeypatch.setattr(run_parser, "STREET_IDS_FILE", street_ids_file)
+    monkeypatch.setattr(run_parser, "street_name_to_id_mapping", {})
+    # Lookups rebuilt from the test mapping are restored after the test
+    for name in ("street_name_lookup", "street_fuzzy_names", "street_fuzzy_ids", "street_id_to_entry"):
+        monkeypatch.setattr(run_parser, name, getattr(run_parser, name))
+    monkeypatch.setattr(run_parser, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(run_parser, "STREETS_FILE", tmp_path / "cian_streets_database.json")
+    monkeypatch.setattr(run_parser, "streets_data", {
+        "moscow": {"streets": {}},
+        "mo": {"streets": {}},
+        "metadata": {"last_updated": "", "streets_count": 0},
+    })
+
+    def fail_geocoding(address, parser):
+        raise AssertionError(f"Address should be resolved locally: {address}")
+
+    monkeypatch.setattr(run_parser, "process_address", fail_geocoding)
+
+    parser = make_parser()
+    assert parser.find_local_street_id("г Москва, ул. Тверская, дом 7") == ("1234", "Тверская", "moscow")
+
+    run_parser.process_addresses(
+        ["г Москва, ул. Тверская, дом 7", "г. Химки, ул. Загородная, дом 4"],
+        parser,
+    )
+
+    assert run_parser.streets_data["moscow"]["streets"] == {"Тверская": "1234"}
+    assert run_parser.streets_data["mo"]["streets"] == {"Загородная": "5678"}
+    assert orjson.loads((tmp_path / "cian_street_ids_simple.json").read_bytes()) == {
+        "Тверская (Москва)": "1234",
+        "Загородная (МО)": "5678",
+    }